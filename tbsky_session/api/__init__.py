@@ -1,35 +1,72 @@
+import asyncio
+import contextlib
 import logging
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 
 import uvicorn
-import uvicorn.server
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
-from tbsky_session.core import AppSettings, get_redis_connection, initialize_database
 
+from tbsky_session.core import (
+    AppSettings,
+    close_global_requests_client,
+    close_redis_connection,
+    configure_span_export,
+    dispose_async_engine,
+    get_redis_connection,
+    get_revoked_token_filter,
+    init_logging,
+    initialize_database,
+    mark_metrics_process_dead,
+    prepare_multiprocess_metrics,
+    shutdown_password_hashing_pool,
+    warm_up_database,
+    warm_up_redis,
+)
+
+from .metrics import MetricsMiddleware, metrics_endpoint
+from .timing import ServerTimingMiddleware
 from .v1 import routers
 
-__all__ = ["init_fastapi_server"]
+__all__ = ["init_fastapi_server", "init_worker_app", "run_fastapi_server"]
 
 log = logging.getLogger(__file__)
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
-    redis = get_redis_connection()
-    log.info(f"Connected to redis: {await redis.ping()}")
-    FastAPICache.init(RedisBackend(redis), prefix="tbsky-session")
+    await asyncio.gather(warm_up_redis(), warm_up_database())
+    FastAPICache.init(RedisBackend(get_redis_connection()), prefix="tbsky-session")
     await initialize_database()
+    revoked_token_filter_sync = (
+        asyncio.create_task(get_revoked_token_filter().sync())
+        if AppSettings.security.BLACKLIST_FILTER_ENABLED
+        else None
+    )
     yield
+    if revoked_token_filter_sync:
+        revoked_token_filter_sync.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await revoked_token_filter_sync
+    await asyncio.gather(
+        close_redis_connection(),
+        dispose_async_engine(),
+        close_global_requests_client(),
+        shutdown_password_hashing_pool(),
+    )
+    log.info("Closed connection pools.")
+    mark_metrics_process_dead()
 
 
 def init_fastapi_server() -> FastAPI:
     app = FastAPI(
         title="TBSky Session Service",
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
         docs_url="/session/docs",  # Customizing Swagger UI path
         openapi_url="/session/docs/openapi.json",  # Customizing OpenAPI JSON path
     )
@@ -44,14 +81,43 @@ def init_fastapi_server() -> FastAPI:
     for router in routers:
         app.include_router(router, prefix="/api/v1")
 
+    if AppSettings.server.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+        app.add_route("/session/metrics", metrics_endpoint, include_in_schema=False)
+
+    if AppSettings.server.TIMING_SAMPLE_RATE > 0:
+        app.add_middleware(ServerTimingMiddleware, export_spans=configure_span_export())
+
     return app
 
 
-async def run_fastapi_server():
-    app = init_fastapi_server()
+def init_worker_app() -> FastAPI:
+    """Application factory of the server, called once in every worker."""
+    init_logging()
+    return init_fastapi_server()
+
+
+def run_fastapi_server():
+    """Serve the application with the settings of ``AppSettings.server``.
 
-    config = uvicorn.Config(
-        app, host=str(AppSettings.server.HOST), port=AppSettings.server.PORT
+    With more than one worker uvicorn supervises spawned worker processes,
+    each builds its own engine and Redis pools. SIGTERM stops accepting
+    connections and lets requests in flight finish within the graceful
+    shutdown timeout.
+    """
+    settings = AppSettings.server
+    if settings.WORKERS > 1 and settings.METRICS_ENABLED:
+        prepare_multiprocess_metrics()
+    uvicorn.run(
+        f"{__name__}:{init_worker_app.__name__}",
+        factory=True,
+        host=str(settings.HOST),
+        port=settings.PORT,
+        workers=settings.WORKERS,
+        loop=settings.LOOP,
+        http=settings.HTTP,
+        backlog=settings.BACKLOG,
+        timeout_keep_alive=settings.KEEP_ALIVE_TIMEOUT_SECONDS,
+        limit_concurrency=settings.LIMIT_CONCURRENCY,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_SECONDS,
     )
-    server = uvicorn.Server(config)
-    await server.serve()
@@ -0,0 +1,56 @@
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from tbsky_session.core import HTTP_REQUEST_DURATION, HTTP_REQUESTS, generate_metrics
+
+__all__ = ["MetricsMiddleware", "metrics_endpoint"]
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Counts requests and observes their latency per route template.
+
+    Routes are labelled by their path template, not the requested path, so
+    the number of series stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the shared scope.
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, route).observe(
+                time.perf_counter() - started_at
+            )
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+
+
+async def metrics_endpoint(_: Request) -> Response:
+    # Aggregating the files of all workers is blocking I/O.
+    return Response(
+        await run_in_threadpool(generate_metrics), media_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,46 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from tbsky_session.core import (
+    export_request_spans,
+    reset_request_timings,
+    start_request_timings,
+)
+
+__all__ = ["ServerTimingMiddleware"]
+
+
+class ServerTimingMiddleware:
+    """Adds a ``Server-Timing`` breakdown to sampled responses.
+
+    Spans recorded while the request is served are summed up by name when the
+    response starts. With ``export_spans`` the request and its spans are also
+    handed to OpenTelemetry once the response is sent.
+    """
+
+    def __init__(self, app: ASGIApp, export_spans: bool = False):
+        self.app = app
+        self.export_spans = export_spans
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (timings := start_request_timings()) is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_request_timings()
+            if self.export_spans:
+                route = getattr(scope.get("route"), "path", scope["path"])
+                export_request_spans(
+                    f"{scope['method']} {route}",
+                    timings,
+                    {"http.method": scope["method"], "http.route": route},
+                )
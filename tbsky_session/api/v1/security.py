@@ -1,19 +1,25 @@
+import uuid
 from typing import Annotated
 
 from fastapi import APIRouter, Body, Cookie, Depends, HTTPException, Response
 from fastapi_restful.cbv import cbv
+from sqlalchemy.exc import IntegrityError
 
 from tbsky_session.core import (
-    BlackListToken,
+    REFRESH_TOKEN_TYPE,
     BlackListTokenRepository,
     PasswordTools,
     ProtectedResource,
     PublicResource,
+    RefreshTokenFamilyRepository,
     User,
+    UserPrincipal,
     UserRepository,
     create_access_token,
     create_refresh_token,
     decode_jwt_token,
+    rate_limit,
+    trusted_response,
 )
 from tbsky_session.schemas import UserCreate, UserLogin
 from tbsky_session.schemas.users import UserOut
@@ -26,18 +32,15 @@ security_router = APIRouter(prefix="/security", tags=["Auth"])
 
 class SecurityResource:
 
-    def _set_response_cookie(self, response: Response, user: User):
-        access_token, expire_access_token_seconds = create_access_token(
-            to_encode={"sub": str(user.user_id)}
-        )
+    def _set_response_cookie(
+        self,
+        response: Response,
+        user: User | UserPrincipal,
+        refresh_token_claims: dict,
+    ):
+        self._set_access_token_cookie(response, user)
         refresh_token, expire_refresh_token_seconds = create_refresh_token(
-            to_encode={"sub": str(user.user_id)}
-        )
-        response.set_cookie(
-            key="access_token",
-            value=access_token,
-            httponly=True,
-            max_age=expire_access_token_seconds,
+            to_encode={"sub": str(user.user_id), **refresh_token_claims}
         )
         response.set_cookie(
             key="refresh_token",
@@ -46,67 +49,104 @@ class SecurityResource:
             max_age=expire_refresh_token_seconds,
         )
 
+    def _set_access_token_cookie(self, response: Response, user: User | UserPrincipal):
+        access_token, expire_access_token_seconds = create_access_token(
+            to_encode={"sub": str(user.user_id), **UserPrincipal.to_claims(user)}
+        )
+        response.set_cookie(
+            key="access_token",
+            value=access_token,
+            httponly=True,
+            max_age=expire_access_token_seconds,
+        )
+
 
 @cbv(security_router)
 class PublickAuthResource(PublicResource, SecurityResource):
-    @security_router.post("/register")
+    @security_router.post("/register", dependencies=[Depends(rate_limit("register"))])
     async def register(
         self,
         response: Response,
         user_create: UserCreate,
         user_repository: UserRepository = Depends(),
+        refresh_token_family_repository: RefreshTokenFamilyRepository = Depends(),
     ):
+        if await user_repository.get_by_email(user_create.email):
+            raise HTTPException(status_code=409, detail="Email is already registered")
         async with user_repository.async_session_factory() as session:
-            new_user = await user_repository.add(
-                User.model_validate(
+            # ``user_create`` is already validated, so the user is built
+            # directly to keep the hashing out of the event loop.
+            try:
+                new_user = await user_repository.add(
                     User(
                         first_name=user_create.first_name,
                         last_name=user_create.last_name,
                         email=user_create.email,
-                        hashed_password=user_create.password.get_secret_value(),
-                    )
-                ),
-                session=session,
+                        hashed_password=await PasswordTools.get_password_hash_async(
+                            user_create.password.get_secret_value()
+                        ),
+                    ),
+                    session=session,
+                )
+            except IntegrityError:
+                raise HTTPException(
+                    status_code=409, detail="Email is already registered"
+                )
+            self._set_response_cookie(
+                response, new_user, await refresh_token_family_repository.start()
             )
-            self._set_response_cookie(response, new_user)
 
-    @security_router.post("/login")
+    @security_router.post("/login", dependencies=[Depends(rate_limit("login"))])
     async def login_from_user(
         self,
         response: Response,
         user: Annotated[UserLogin, Body()],
         user_repository: UserRepository = Depends(),
+        refresh_token_family_repository: RefreshTokenFamilyRepository = Depends(),
     ):
-        if found_user := (await user_repository.get_first(email=user.email)):
-            if PasswordTools.verify_password(
+        if found_user := (await user_repository.get_by_email(user.email)):
+            if await PasswordTools.verify_password_async(
                 user.password.get_secret_value(), found_user.hashed_password
             ):
-                self._set_response_cookie(response, found_user)
+                self._set_response_cookie(
+                    response,
+                    found_user,
+                    await refresh_token_family_repository.start(),
+                )
                 return
         raise HTTPException(status_code=401, detail="Incorrect username or password")
 
-
-@cbv(security_router)
-class AuthResource(ProtectedResource, SecurityResource):
-
-    @security_router.post("/access_token")
-    async def login_for_access_token(
-        self,
-        response: Response,
-    ):
-        self._set_response_cookie(response, self.user)
-        return {"message": "Login successful"}
-
     @security_router.post("/refresh_token")
     async def refresh_access_token(
         self,
         response: Response,
         refresh_token: str = Cookie(),
+        user_repository: UserRepository = Depends(),
+        refresh_token_family_repository: RefreshTokenFamilyRepository = Depends(),
     ):
-        user_id_from_refresh = decode_jwt_token(refresh_token).get("sub")
-        if str(self.user.user_id) != user_id_from_refresh:
-            raise HTTPException(status_code=401, detail="Invalid access token")
-        self._set_response_cookie(response, self.user)
+        """Exchange a refresh token for a new pair, the old one is used up."""
+        refresh_token_payload = decode_jwt_token(refresh_token)
+        if refresh_token_payload.get("typ") != REFRESH_TOKEN_TYPE:
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+        refresh_token_claims = await refresh_token_family_repository.rotate(
+            refresh_token_payload
+        )
+        user = await user_repository.get_first(
+            user_id=uuid.UUID(refresh_token_payload["sub"])
+        )
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+        self._set_response_cookie(response, user, refresh_token_claims)
+        return {"message": "Login successful"}
+
+
+@cbv(security_router)
+class AuthResource(ProtectedResource, SecurityResource):
+
+    @security_router.post("/access_token")
+    async def login_for_access_token(self, response: Response):
+        """Renew the access token only, refresh tokens come from a login."""
+        self._set_access_token_cookie(response, self.user)
         return {"message": "Login successful"}
 
     @security_router.post("/logout")
@@ -114,15 +154,20 @@ class AuthResource(ProtectedResource, SecurityResource):
         self,
         response: Response,
         black_list_token_repository: BlackListTokenRepository = Depends(),
+        refresh_token_family_repository: RefreshTokenFamilyRepository = Depends(),
         access_token: str = Cookie(),
         refresh_token: str = Cookie(),
     ):
-        await black_list_token_repository.add(
-            BlackListToken(access_token=access_token, refresh_token=refresh_token)
-        )
-        await black_list_token_repository.add(
-            BlackListToken(access_token=refresh_token, refresh_token=refresh_token)
-        )
+        try:
+            family = decode_jwt_token(refresh_token).get("fam")
+        except HTTPException:
+            family = None
+        if family:
+            await black_list_token_repository.revoke(access_token)
+            await refresh_token_family_repository.revoke(family)
+        else:
+            # Refresh tokens issued before rotation have no family.
+            await black_list_token_repository.revoke(access_token, refresh_token)
         response.delete_cookie(key="access_token")
         response.delete_cookie(key="refresh_token")
         return {"message": "Logout successful"}
@@ -132,4 +177,6 @@ class AuthResource(ProtectedResource, SecurityResource):
 class UsersResource(ProtectedResource):
     @users_router.get("/me", response_model=UserOut)
     async def get_me(self, user_repository: UserRepository = Depends()):
-        return self.user
+        # The user comes from the database or signed claims, no need to
+        # validate it into ``UserOut`` again.
+        return trusted_response(UserOut, self.user)
@@ -2,9 +2,11 @@ from .config import AppSettings
 from .consts import *
 from .db_session import *
 from .logging import *
+from .metrics import *
 from .models import *
 from .repository import *
 from .schema import *
 from .security import *
 from .service import *
+from .tracing import *
 from .types import *
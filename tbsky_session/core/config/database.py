@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import Field, PostgresDsn, RedisDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -9,3 +11,32 @@ class DatabaseSettings(BaseSettings):
 
     DATABASE_URL: PostgresDsn = Field()
     REDIS_DSN: RedisDsn = Field()
+
+    # Postgres connection pool
+    POOL_SIZE: int = Field(default=10, ge=1)
+    POOL_MAX_OVERFLOW: int = Field(default=20, ge=0)
+    POOL_PRE_PING: bool = Field(default=True)
+    POOL_RECYCLE_SECONDS: int = Field(default=1800, ge=-1)
+    POOL_TIMEOUT_SECONDS: float = Field(default=30, gt=0)
+    CONNECT_TIMEOUT_SECONDS: float = Field(default=10, gt=0)
+    COMMAND_TIMEOUT_SECONDS: float | None = Field(default=60, gt=0)
+    BULK_INSERT_CHUNK_SIZE: int = Field(default=1000, ge=1)
+    ITER_BATCH_SIZE: int = Field(default=1000, ge=1)
+    STATEMENT_CACHE_SIZE: int = Field(default=512, ge=0)
+    WARMUP_CONNECTIONS: int = Field(default=5, ge=0)
+
+    # Redis connection pool
+    REDIS_MAX_CONNECTIONS: int = Field(default=50, ge=1)
+    REDIS_POOL_TIMEOUT_SECONDS: float = Field(default=5, gt=0)
+    REDIS_SOCKET_TIMEOUT_SECONDS: float | None = Field(default=5, gt=0)
+    REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS: float | None = Field(default=5, gt=0)
+    REDIS_HEALTH_CHECK_INTERVAL_SECONDS: int = Field(default=30, ge=0)
+    REDIS_RETRY_ON_TIMEOUT: bool = Field(default=True)
+    REDIS_PIPELINE_CHUNK_SIZE: int = Field(default=500, ge=1)
+    REDIS_SCAN_COUNT: int = Field(default=1000, ge=1)
+    REDIS_WARMUP_CONNECTIONS: int = Field(default=5, ge=0)
+
+    # Redis value encoding, "json" keeps values readable by older releases.
+    REDIS_CODEC: Literal["json", "orjson", "msgpack"] = Field(default="json")
+    REDIS_COMPRESSION: Literal["none", "zlib", "lz4"] = Field(default="none")
+    REDIS_COMPRESSION_MIN_BYTES: int = Field(default=512, ge=0)
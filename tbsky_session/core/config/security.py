@@ -13,3 +13,26 @@ class SecuritySettings(BaseSettings):
     JWT_ALGORITHM: Literal["HS256", "HS384", "HS512"] = Field(default="HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=15)
     REFRESH_TOKEN_EXPIRE_DAYS: int = Field(default=1, ge=0, le=15)
+    TOKEN_CACHE_SIZE: int = Field(default=4096, ge=0)
+    TOKEN_CACHE_TTL_SECONDS: float = Field(default=60, ge=0)
+    PRINCIPAL_CLAIMS_ENABLED: bool = Field(default=False)
+    PRINCIPAL_CLAIMS_VERSION: int = Field(default=1, ge=1)
+    # Older access tokens are checked against the database again, so a
+    # deleted user is locked out after this long at most.
+    PRINCIPAL_CLAIMS_MAX_AGE_SECONDS: int = Field(default=60, ge=0)
+
+    BLACKLIST_FILTER_ENABLED: bool = Field(default=True)
+    BLACKLIST_FILTER_CAPACITY: int = Field(default=1_000_000, ge=1)
+    BLACKLIST_FILTER_FALSE_POSITIVE_RATE: float = Field(default=0.001, gt=0, lt=1)
+    BLACKLIST_FILTER_REBUILD_SECONDS: float = Field(default=300, gt=0)
+
+    PASSWORD_HASHING_EXECUTOR: Literal["thread", "process"] = Field(default="thread")
+    PASSWORD_HASHING_WORKERS: int = Field(default=4, ge=1)
+    PASSWORD_HASHING_QUEUE_SIZE: int = Field(default=32, ge=0)
+    PASSWORD_HASHING_RETRY_AFTER_SECONDS: int = Field(default=1, ge=0)
+
+    RATE_LIMIT_ENABLED: bool = Field(default=True)
+    RATE_LIMIT_IP_REQUESTS: int = Field(default=30, ge=1)
+    RATE_LIMIT_IP_WINDOW_SECONDS: float = Field(default=60, gt=0)
+    RATE_LIMIT_EMAIL_REQUESTS: int = Field(default=5, ge=1)
+    RATE_LIMIT_EMAIL_WINDOW_SECONDS: float = Field(default=300, gt=0)
@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import AnyUrl, Field, IPvAnyAddress
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -9,3 +11,24 @@ class ServerSettings(BaseSettings):
 
     HOST: IPvAnyAddress | AnyUrl = Field(default="127.0.0.1")  # type: ignore
     PORT: int = Field(default=8088, ge=0, le=65535)
+
+    # Worker processes share the listening socket opened by the supervisor.
+    WORKERS: int = Field(default=1, ge=1)
+    # "auto" picks uvloop and httptools when they are installed.
+    LOOP: Literal["auto", "asyncio", "uvloop"] = Field(default="auto")
+    HTTP: Literal["auto", "h11", "httptools"] = Field(default="auto")
+    BACKLOG: int = Field(default=2048, ge=1)
+    # Longer than the usual 60 seconds idle timeout of load balancers, so
+    # they never reuse a connection the server is closing.
+    KEEP_ALIVE_TIMEOUT_SECONDS: int = Field(default=65, ge=1)
+    LIMIT_CONCURRENCY: Optional[int] = Field(default=None, ge=1)
+    GRACEFUL_SHUTDOWN_SECONDS: int = Field(default=30, ge=0)
+
+    METRICS_ENABLED: bool = Field(default=True)
+
+    # Share of requests answered with a ``Server-Timing`` breakdown, 0 turns
+    # the instrumentation off entirely.
+    TIMING_SAMPLE_RATE: float = Field(default=0, ge=0, le=1)
+    OTEL_EXPORT_ENABLED: bool = Field(default=False)
+    OTEL_EXPORT_ENDPOINT: str = Field(default="http://localhost:4318/v1/traces")
+    OTEL_SERVICE_NAME: str = Field(default="tbsky-session")
@@ -1,2 +1,4 @@
-__all__ = ["SERVICE_ROOT_FOLDER_NAME"]
+__all__ = ["SERVICE_ROOT_FOLDER_NAME", "NAMESPACE_INDEX_KEY_PREFIX"]
 SERVICE_ROOT_FOLDER_NAME = "tbsky_session"
+# Sorted sets indexing a key namespace live under ``index:<key prefix>``.
+NAMESPACE_INDEX_KEY_PREFIX = "index:"
@@ -1,9 +1,27 @@
 from enum import Enum
 
-__all__ = ["LoginProviderEnum"]
+__all__ = [
+    "LoginProviderEnum",
+    "BLACKLIST_KEY_PREFIX",
+    "BLACKLIST_CHANNEL",
+    "RATE_LIMIT_KEY_PREFIX",
+    "REFRESH_FAMILY_KEY_PREFIX",
+    "ACCESS_TOKEN_TYPE",
+    "REFRESH_TOKEN_TYPE",
+]
 
 
 class LoginProviderEnum(str, Enum):
     GOOGLE = "google"
     EMIAL = "none"
     FACEBOOK = "facebook"
+
+
+BLACKLIST_KEY_PREFIX = "blacklist:"
+BLACKLIST_CHANNEL = "blacklist:revoked"
+RATE_LIMIT_KEY_PREFIX = "ratelimit:"
+REFRESH_FAMILY_KEY_PREFIX = "refresh_family:"
+
+# Value of the ``typ`` claim, a token is only accepted where its type is.
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
@@ -1,12 +1,188 @@
+import asyncio
+import logging
+import os
+import time
 from functools import cache
+from typing import Optional
+
+from redis.asyncio.client import Pipeline, Redis
+from redis.asyncio.connection import BlockingConnectionPool, DefaultParser
+from redis.exceptions import ConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
 
-from redis import asyncio as aioredis
-from redis.asyncio.client import Redis
 from tbsky_session.core import AppSettings
 
-__all__ = ["get_redis_connection"]
+from ..schema import BaseSchema
+from ..tracing import traced
+
+log = logging.getLogger(__file__)
+
+__all__ = [
+    "get_redis_connection",
+    "get_redis_pool_statistics",
+    "warm_up_redis",
+    "close_redis_connection",
+    "InstrumentedConnectionPool",
+    "RedisPoolStatistics",
+    "TracedRedis",
+]
+
+
+class RedisPoolStatistics(BaseSchema):
+    max_connections: int
+    created: int
+    in_use: int
+    idle: int
+    waiters: int
+    acquisitions: int
+    acquire_timeouts: int
+    connect_failures: int
+    acquire_seconds_total: float
+
+
+# ``BlockingConnectionPool`` raises this when no slot frees up in time.
+POOL_EXHAUSTED_MESSAGE = "No connection available."
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """Blocking pool that counts checkouts and the time spent waiting.
+
+    A checkout fails either because the pool stayed exhausted for ``timeout``
+    or because the connection could not be (re)established, the two are
+    counted apart.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.acquisitions = 0
+        self.acquire_timeouts = 0
+        self.connect_failures = 0
+        self.acquire_seconds_total = 0.0
+
+    def reset(self):
+        # Runs from ``__init__`` and again when a forked child inherits the pool.
+        super().reset()
+        self.created = 0
+        self.waiters = 0
+        self._checked_out: set[int] = set()
+
+    def make_connection(self):
+        self.created += 1
+        return super().make_connection()
+
+    async def get_connection(self, *args, **kwargs):
+        started_at = time.perf_counter()
+        self.waiters += 1
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except ConnectionError as exc:
+            if exc.args == (POOL_EXHAUSTED_MESSAGE,):
+                self.acquire_timeouts += 1
+            else:
+                self.connect_failures += 1
+            raise
+        except (RedisTimeoutError, OSError):
+            self.connect_failures += 1
+            raise
+        finally:
+            self.waiters -= 1
+            self.acquire_seconds_total += time.perf_counter() - started_at
+        self.acquisitions += 1
+        self._checked_out.add(id(connection))
+        return connection
+
+    async def release(self, connection):
+        self._checked_out.discard(id(connection))
+        await super().release(connection)
+
+    def statistics(self) -> RedisPoolStatistics:
+        in_use = len(self._checked_out)
+        return RedisPoolStatistics(
+            max_connections=self.max_connections,
+            created=self.created,
+            in_use=in_use,
+            idle=self.created - in_use,
+            waiters=self.waiters,
+            acquisitions=self.acquisitions,
+            acquire_timeouts=self.acquire_timeouts,
+            connect_failures=self.connect_failures,
+            acquire_seconds_total=self.acquire_seconds_total,
+        )
+
+
+class TracedPipeline(Pipeline):
+    @traced("redis")
+    async def execute(self, raise_on_error: bool = True):
+        return await super().execute(raise_on_error)
+
+
+class TracedRedis(Redis):
+    """Client recording commands as ``redis`` spans of sampled requests."""
+
+    @traced("redis")
+    async def execute_command(self, *args, **options):
+        return await super().execute_command(*args, **options)
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: Optional[str] = None
+    ) -> Pipeline:
+        return TracedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
 
 
 @cache
 def get_redis_connection() -> Redis:
-    return aioredis.from_url(str(AppSettings.database.REDIS_DSN))
+    settings = AppSettings.database
+    connection_pool = InstrumentedConnectionPool.from_url(
+        str(settings.REDIS_DSN),
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+        socket_keepalive=True,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+        retry_on_timeout=settings.REDIS_RETRY_ON_TIMEOUT,
+    )
+    # redis-py picks the hiredis parser by itself once ``hiredis`` is installed.
+    log.info(f"Redis responses are parsed with {DefaultParser.__name__}")
+    if AppSettings.server.TIMING_SAMPLE_RATE > 0:
+        return TracedRedis(connection_pool=connection_pool)
+    return Redis(connection_pool=connection_pool)
+
+
+# redis-py resets inherited pools lazily, dropping the client is explicit.
+os.register_at_fork(after_in_child=get_redis_connection.cache_clear)
+
+
+def get_redis_pool_statistics() -> RedisPoolStatistics:
+    """Return a snapshot of the process-wide Redis connection pool usage."""
+    connection_pool = get_redis_connection().connection_pool
+    return connection_pool.statistics()  # type: ignore
+
+
+async def warm_up_redis(connections: int | None = None) -> None:
+    """Connect pool slots up front so first requests don't pay for them."""
+    settings = AppSettings.database
+    if connections is None:
+        connections = settings.REDIS_WARMUP_CONNECTIONS
+    connections = min(connections, settings.REDIS_MAX_CONNECTIONS)
+    connection_pool = get_redis_connection().connection_pool
+    acquired = await asyncio.gather(
+        *(connection_pool.get_connection("PING") for _ in range(connections)),
+        return_exceptions=True,
+    )
+    for connection in acquired:
+        if not isinstance(connection, BaseException):
+            await connection_pool.release(connection)
+    for connection in acquired:
+        if isinstance(connection, BaseException):
+            raise connection
+    log.info(f"Opened {connections} redis connections.")
+
+
+async def close_redis_connection() -> None:
+    """Close the process-wide client together with its pool."""
+    if get_redis_connection.cache_info().currsize:
+        await get_redis_connection().close(close_connection_pool=True)
+    get_redis_connection.cache_clear()
@@ -1,34 +1,102 @@
+import asyncio
+import hashlib
 import logging
-from contextlib import asynccontextmanager
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from functools import cache
 from typing import AsyncGenerator
 
 from asyncpg import TooManyConnectionsError
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import Column, Connection, MetaData, String, Table, text
+from sqlalchemy.engine import Dialect
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.schema import CreateIndex, CreateTable
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_fixed
 
 from ..config import AppSettings
+from ..schema import BaseSchema
+from ..tracing import instrument_engine
 
 log = logging.getLogger(__file__)
 
+# Serializes schema creation of workers starting at the same time.
+SCHEMA_LOCK_ID = 0x7462736B
+
+# Fingerprint of the DDL the schema was last created from, kept apart from
+# the models' metadata.
+schema_fingerprint_table = Table(
+    "schema_fingerprint",
+    MetaData(),
+    Column("fingerprint", String(64), primary_key=True),
+)
+
 __all__ = [
     "get_async_engine",
+    "get_async_session_factory",
+    "get_pool_statistics",
     "initialize_database",
+    "warm_up_database",
+    "dispose_async_engine",
     "get_async_session",
+    "PoolStatistics",
+    "InstrumentedQueuePool",
 ]
 
 
+class PoolStatistics(BaseSchema):
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    waiters: int
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that counts checkouts waiting for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiters = 0
+
+    def _do_get(self):
+        # Checkouts only yield to other tasks while they wait for a free
+        # connection or open a new one.
+        self.waiters += 1
+        try:
+            return super()._do_get()
+        finally:
+            self.waiters -= 1
+
+
+@cache
 def get_async_engine() -> AsyncEngine:
-    """Return async database engine."""
+    """Return the process-wide async database engine.
+
+    The engine owns the connection pool, so it is created once per process
+    and shared by every session.
+    """
+    settings = AppSettings.database
     try:
         async_engine: AsyncEngine = create_async_engine(
-            str(AppSettings.database.DATABASE_URL),
+            str(settings.DATABASE_URL),
             future=True,
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.POOL_SIZE,
+            max_overflow=settings.POOL_MAX_OVERFLOW,
+            pool_pre_ping=settings.POOL_PRE_PING,
+            pool_recycle=settings.POOL_RECYCLE_SECONDS,
+            pool_timeout=settings.POOL_TIMEOUT_SECONDS,
+            connect_args={
+                "timeout": settings.CONNECT_TIMEOUT_SECONDS,
+                "command_timeout": settings.COMMAND_TIMEOUT_SECONDS,
+            },
             # echo=True,
         )
     except SQLAlchemyError:
@@ -38,26 +106,138 @@ def get_async_engine() -> AsyncEngine:
         )
         raise
 
+    if AppSettings.server.TIMING_SAMPLE_RATE > 0:
+        instrument_engine(async_engine.sync_engine)
     return async_engine
 
 
+@cache
+def get_async_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Return the session factory bound to the process-wide engine."""
+    return async_sessionmaker(
+        bind=get_async_engine(),
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+def _reset_after_fork() -> None:
+    # Connections inherited from the parent belong to it, so the child drops
+    # them without closing and builds its own pool on first use.
+    if get_async_engine.cache_info().currsize:
+        get_async_engine().sync_engine.dispose(close=False)
+    get_async_engine.cache_clear()
+    get_async_session_factory.cache_clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_pool_statistics() -> PoolStatistics:
+    """Return a snapshot of the process-wide connection pool usage."""
+    pool = get_async_engine().pool
+    if not isinstance(pool, QueuePool):
+        return PoolStatistics(size=0, checked_out=0, idle=0, overflow=0, waiters=0)
+    return PoolStatistics(
+        size=pool.size(),
+        checked_out=pool.checkedout(),
+        idle=pool.checkedin(),
+        overflow=max(pool.overflow(), 0),
+        waiters=getattr(pool, "waiters", 0),
+    )
+
+
+def _create_missing_indexes(connection: Connection, metadata: MetaData) -> None:
+    # Reflection misses expression indexes on some dialects, so the database
+    # checks for the name instead of ``checkfirst``.
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _get_schema_fingerprint(metadata: MetaData, dialect: Dialect) -> str:
+    statements = []
+    for table in metadata.sorted_tables:
+        statements.append(str(CreateTable(table).compile(dialect=dialect)))
+        statements.extend(
+            str(CreateIndex(index).compile(dialect=dialect))
+            for index in sorted(table.indexes, key=lambda index: str(index.name))
+        )
+    return hashlib.sha256("\n".join(statements).encode()).hexdigest()
+
+
+async def _get_stored_schema_fingerprint(async_engine: AsyncEngine) -> str | None:
+    async with async_engine.connect() as async_conn:
+        try:
+            return (
+                await async_conn.execute(schema_fingerprint_table.select())
+            ).scalar()
+        except DBAPIError:
+            # The fingerprint table is created with the first schema.
+            return None
+
+
 async def initialize_database() -> None:
     """Create table in metadata if they don't exist yet.
 
-    This uses a sync connection because the 'create_all' doesn't
-    feature async yet.
+    DDL is skipped when the schema was created from the same table and
+    index definitions before. This uses a sync connection because the
+    'create_all' doesn't feature async yet.
     """
+    from sqlmodel import SQLModel
+
     from tbsky_session import models  # noqa
     from tbsky_session.core import models as core_models  # noqa
 
     async_engine = get_async_engine()
-    async with async_engine.begin() as async_conn:
-        from sqlmodel import SQLModel
+    fingerprint = _get_schema_fingerprint(SQLModel.metadata, async_engine.dialect)
+    if await _get_stored_schema_fingerprint(async_engine) == fingerprint:
+        log.info("Database schema is up to date, skipped initializing it.")
+        return
 
+    async with async_engine.begin() as async_conn:
+        if async_conn.dialect.name == "postgresql":
+            await async_conn.execute(
+                text("SELECT pg_advisory_xact_lock(:lock_id)"),
+                {"lock_id": SCHEMA_LOCK_ID},
+            )
         await async_conn.run_sync(SQLModel.metadata.create_all)
+        # ``create_all`` skips existing tables together with their indexes.
+        await async_conn.run_sync(_create_missing_indexes, SQLModel.metadata)
+        await async_conn.run_sync(schema_fingerprint_table.create, checkfirst=True)
+        await async_conn.execute(schema_fingerprint_table.delete())
+        await async_conn.execute(
+            schema_fingerprint_table.insert().values(fingerprint=fingerprint)
+        )
         log.info("Initializing database was successfull.")
 
 
+async def warm_up_database(connections: int | None = None) -> None:
+    """Open pool connections up front so first requests don't pay for them."""
+    settings = AppSettings.database
+    if connections is None:
+        connections = settings.WARMUP_CONNECTIONS
+    connections = min(connections, settings.POOL_SIZE)
+    async_engine = get_async_engine()
+    async with AsyncExitStack() as stack:
+        await asyncio.gather(
+            *(
+                stack.enter_async_context(async_engine.connect())
+                for _ in range(connections)
+            )
+        )
+    log.info(f"Opened {connections} database connections.")
+
+
+async def dispose_async_engine() -> None:
+    """Close every pooled connection of the process-wide engine."""
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+    get_async_engine.cache_clear()
+    get_async_session_factory.cache_clear()
+
+
 @asynccontextmanager
 @retry(
     retry=retry_if_exception_type(TooManyConnectionsError),
@@ -74,13 +254,7 @@ async def get_async_session(
     All conversations with the database are established via the session
     objects. Also. the sessions act as holding zone for ORM-mapped objects.
     """
-    AsyncSessionFactory = async_sessionmaker(
-        bind=get_async_engine(),
-        class_=AsyncSession,
-        autoflush=False,
-        expire_on_commit=False,
-    )
-    async with AsyncSessionFactory() as session:
+    async with get_async_session_factory()() as session:
         try:
             if in_transaction:
                 async with session.begin():
@@ -0,0 +1,199 @@
+import os
+import tempfile
+import time
+from functools import wraps
+from typing import Any, Callable, Coroutine, Iterator, ParamSpec, TypeVar
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.metrics_core import Metric
+from prometheus_client.registry import Collector
+
+from .db_session import (
+    get_async_engine,
+    get_pool_statistics,
+    get_redis_connection,
+    get_redis_pool_statistics,
+)
+
+__all__ = [
+    "HTTP_REQUESTS",
+    "HTTP_REQUEST_DURATION",
+    "DB_QUERY_DURATION",
+    "REDIS_COMMAND_DURATION",
+    "PASSWORD_HASHING_PENDING",
+    "PASSWORD_HASHING_QUEUED",
+    "CACHE_LOOKUPS",
+    "POOL_STATISTICS",
+    "PoolStatisticsCollector",
+    "is_multiprocess_metrics",
+    "observe_duration",
+    "generate_metrics",
+    "prepare_multiprocess_metrics",
+    "mark_metrics_process_dead",
+]
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route and status code.",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ["method", "route"],
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Duration of database repository calls.",
+    ["repository", "operation"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Duration of redis repository calls.",
+    ["repository", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+PASSWORD_HASHING_PENDING = Gauge(
+    "password_hashing_pending",
+    "Password hashing jobs admitted to the pool.",
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASHING_QUEUED = Gauge(
+    "password_hashing_queued",
+    "Password hashing jobs waiting for a worker.",
+    multiprocess_mode="livesum",
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "In-process cache lookups by cache and result.",
+    ["cache", "result"],
+)
+
+DB_POOL_GAUGES = {
+    "size": "Connections the database pool keeps open.",
+    "checked_out": "Database connections in use.",
+    "idle": "Database connections waiting in the pool.",
+    "overflow": "Database connections opened beyond the pool size.",
+    "waiters": "Checkouts waiting for a database connection.",
+}
+REDIS_POOL_GAUGES = {
+    "max_connections": "Connections the redis pool may open.",
+    "created": "Redis connections opened by the pool.",
+    "in_use": "Redis connections in use.",
+    "idle": "Redis connections waiting in the pool.",
+    "waiters": "Checkouts waiting for a redis connection.",
+}
+REDIS_POOL_COUNTERS = {
+    "acquisitions": "Redis connections handed out by the pool.",
+    "acquire_timeouts": "Redis checkouts that timed out waiting for the pool.",
+    "connect_failures": "Redis checkouts that failed to connect.",
+    "acquire_seconds_total": "Time spent waiting for redis connections.",
+}
+
+
+class PoolStatisticsCollector(Collector):
+    """Report the connection pools of this process at scrape time.
+
+    Pools are only read once they exist, a scrape never creates the engine
+    or the redis client. Samples carry the ``pid`` label, pools belong to a
+    single worker.
+    """
+
+    def collect(self) -> Iterator[Metric]:
+        pid = str(os.getpid())
+        if get_async_engine.cache_info().currsize:
+            db_statistics = get_pool_statistics()
+            for name, documentation in DB_POOL_GAUGES.items():
+                gauge = GaugeMetricFamily(
+                    f"db_pool_{name}", documentation, labels=["pid"]
+                )
+                gauge.add_metric([pid], getattr(db_statistics, name))
+                yield gauge
+        if get_redis_connection.cache_info().currsize:
+            redis_statistics = get_redis_pool_statistics()
+            for name, documentation in REDIS_POOL_GAUGES.items():
+                gauge = GaugeMetricFamily(
+                    f"redis_pool_{name}", documentation, labels=["pid"]
+                )
+                gauge.add_metric([pid], getattr(redis_statistics, name))
+                yield gauge
+            for name, documentation in REDIS_POOL_COUNTERS.items():
+                counter = CounterMetricFamily(
+                    f"redis_pool_{name}", documentation, labels=["pid"]
+                )
+                counter.add_metric([pid], getattr(redis_statistics, name))
+                yield counter
+
+
+POOL_STATISTICS = PoolStatisticsCollector()
+REGISTRY.register(POOL_STATISTICS)
+
+
+def is_multiprocess_metrics() -> bool:
+    # With ``PROMETHEUS_MULTIPROC_DIR`` set every process writes its samples
+    # to memory mapped files there and a scrape of any worker reads them all.
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+def observe_duration(
+    histogram: Histogram, operation: str
+) -> Callable[
+    [Callable[P, Coroutine[Any, Any, R]]], Callable[P, Coroutine[Any, Any, R]]
+]:
+    """Record the duration of a repository method, labelled by repository."""
+
+    def decorator(
+        func: Callable[P, Coroutine[Any, Any, R]],
+    ) -> Callable[P, Coroutine[Any, Any, R]]:
+        @wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            started_at = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                # Repository methods are decorated, so ``args[0]`` is ``self``.
+                histogram.labels(type(args[0]).__name__, operation).observe(
+                    time.perf_counter() - started_at
+                )
+
+        return wrapper
+
+    return decorator
+
+
+def generate_metrics() -> bytes:
+    """Render the metrics of this process, or of all workers."""
+    if not is_multiprocess_metrics():
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    # Pool figures live in memory, only the worker serving the scrape has them.
+    registry.register(POOL_STATISTICS)
+    return generate_latest(registry)
+
+
+def prepare_multiprocess_metrics() -> None:
+    """Give workers about to be started a fresh shared metrics directory."""
+    if not is_multiprocess_metrics():
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(
+            prefix="tbsky-session-metrics-"
+        )
+
+
+def mark_metrics_process_dead() -> None:
+    """Drop the live gauges of this process from the aggregated metrics."""
+    if is_multiprocess_metrics():
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,5 +1,6 @@
 import uuid
 from datetime import datetime
+from typing import ClassVar, Optional
 
 from pydantic import Field
 
@@ -14,3 +15,10 @@ class BaseRedisModel(BaseSchema):
 
     created_by: str = Field(default_factory=lambda: AppSettings.users.DEFAULT_USER_ID)
     created_at: datetime = Field(default_factory=datetime.now)
+
+    # Default expiry in seconds, ``None`` keeps entries forever.
+    ttl: ClassVar[Optional[int]] = None
+
+    def get_ttl(self) -> Optional[int]:
+        """Return the expiry of this entry, override to derive it per instance."""
+        return self.ttl
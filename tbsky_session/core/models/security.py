@@ -1,8 +1,9 @@
-from typing import Literal, TypeAlias
+from typing import Literal, Optional, TypeAlias
 
 from pydantic import Field, model_validator
 
 from ..schema import BaseSchema
+from ..security import get_token_expires_in
 from .redis_model import BaseRedisModel
 
 __all__ = ["Token", "TokenBase", "BlackListToken"]
@@ -27,3 +28,7 @@ class BlackListToken(Token):
     def after_validation(self):
         self.key = self.access_token
         return self
+
+    def get_ttl(self) -> Optional[int]:
+        # Nothing needs to be blacklisted once the token expired by itself.
+        return get_token_expires_in(self.access_token)
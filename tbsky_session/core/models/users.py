@@ -1,15 +1,19 @@
-from typing import Annotated
+import time
+import uuid
+from typing import Annotated, Any, Optional
 
 from pydantic import EmailStr
 from pydantic import Field as PydanticField
 from pydantic.experimental.pipeline import validate_as
+from sqlalchemy import Index, column, func
 from sqlmodel import Field
 
+from ..config import AppSettings
 from ..schema import BaseSchema
 from ..security import PasswordTools
 from .base_model import BaseModel, PrimaryKeyType, make_primary_key
 
-__all__ = ["User", "UserBase"]
+__all__ = ["User", "UserBase", "UserPrincipal"]
 
 
 class UserBase(BaseSchema):
@@ -21,6 +25,18 @@ class UserBase(BaseSchema):
 
 class User(BaseModel, UserBase, table=True):
     __tablename__ = "users"
+    __table_args__ = (
+        # Emails are unique among active users only, so the email of a soft
+        # deleted user can be registered again. The predicate matches the
+        # ``deleted IS false`` filter of the login lookup.
+        Index(
+            "ux_users_email_lower_active",
+            func.lower(column("email")),
+            unique=True,
+            postgresql_where=column("deleted").is_(False),
+            sqlite_where=column("deleted").is_(False),
+        ),
+    )
 
     user_id: PrimaryKeyType = make_primary_key()
 
@@ -28,3 +44,48 @@ class User(BaseModel, UserBase, table=True):
     hashed_password: Annotated[
         str, validate_as(str).transform(PasswordTools.get_password_hash)
     ] = Field()
+
+
+class UserPrincipal(UserBase):
+    """User rebuilt from signed access token claims without a database hit.
+
+    Claims are only trusted when their version matches
+    ``PRINCIPAL_CLAIMS_VERSION``, bumping it sends every older token back to
+    the database. They are also only trusted for
+    ``PRINCIPAL_CLAIMS_MAX_AGE_SECONDS`` after the token was issued, older
+    tokens go back to the database, which rejects deleted users.
+    """
+
+    user_id: PrimaryKeyType
+
+    @staticmethod
+    def to_claims(user: UserBase) -> dict[str, Any]:
+        settings = AppSettings.security
+        if not settings.PRINCIPAL_CLAIMS_ENABLED:
+            return {}
+        return {
+            "pcv": settings.PRINCIPAL_CLAIMS_VERSION,
+            "fn": user.first_name,
+            "ln": user.last_name,
+            "em": user.email,
+        }
+
+    @classmethod
+    def from_claims(cls, payload: dict[str, Any]) -> Optional["UserPrincipal"]:
+        settings = AppSettings.security
+        if not settings.PRINCIPAL_CLAIMS_ENABLED:
+            return None
+        if payload.get("pcv") != settings.PRINCIPAL_CLAIMS_VERSION:
+            return None
+        try:
+            if time.time() - payload["iat"] > settings.PRINCIPAL_CLAIMS_MAX_AGE_SECONDS:
+                return None
+            # The claims are signed by us, so validation is skipped.
+            return cls.model_construct(
+                user_id=uuid.UUID(payload["sub"]),
+                first_name=payload["fn"],
+                last_name=payload["ln"],
+                email=payload["em"],
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
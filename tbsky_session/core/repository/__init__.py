@@ -1,6 +1,8 @@
 from .abc_repository import *
 from .db_repository import *
+from .redis_codecs import *
 from .redis_repository import *
 from .rest_repository import *
+from .statement_cache import *
 from .tokens_repository import *
 from .users_repository import *
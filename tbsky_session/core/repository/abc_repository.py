@@ -1,5 +1,5 @@
 from abc import ABC
-from typing import Generator, Iterable, Optional
+from typing import AsyncIterator, Iterable, Optional
 
 __all__ = [
     "GetRepository",
@@ -19,7 +19,7 @@ class GetRepository[T](EmptyRepository, ABC):
     async def get(self, *args, **kwargs) -> list[T]:
         raise NotImplementedError
 
-    async def get_iter(self, *args, **kwargs) -> Generator[T, None, None]:
+    def get_iter(self, *args, **kwargs) -> AsyncIterator[T]:
         raise NotImplementedError
 
     async def get_dict_list(self, *args, **kwargs) -> dict[str, list[T]]:
@@ -38,6 +38,12 @@ class GetRepository[T](EmptyRepository, ABC):
             return result[0]
         raise ValueError
 
+    async def exists(self, *args, **kwargs) -> bool:
+        return await self.get_first(*args, **kwargs) is not None
+
+    async def count(self, *args, **kwargs) -> int:
+        return len(await self.get(*args, **kwargs))
+
 
 class AddRepository[T](EmptyRepository, ABC):
     async def add(self, model: T, *args, **kwargs) -> T:
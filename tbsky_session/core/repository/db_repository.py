@@ -1,16 +1,33 @@
 import logging
 from abc import ABC
 from contextlib import _AsyncGeneratorContextManager
-from typing import Callable, Iterable, Optional, Type, TypeVar
+from datetime import UTC, datetime
+from itertools import batched
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Hashable,
+    Iterable,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    overload,
+)
 
+from sqlalchemy import Executable, Row, RowMapping, Select, bindparam, func, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import col, select
 
+from tbsky_session.core.config import AppSettings
 from tbsky_session.core.db_session import get_async_session
+from tbsky_session.core.metrics import DB_QUERY_DURATION, observe_duration
 from tbsky_session.core.schema import BaseSchema
 
 from ..models.base_model import BaseModel
 from .abc_repository import GenericRepository
+from .statement_cache import get_statement_cache
 
 log = logging.getLogger(__file__)
 
@@ -19,6 +36,7 @@ __all__ = ["BaseDbRepository"]
 
 MODEL_VAR = TypeVar("MODEL_VAR", bound=BaseModel)
 EDIT_MODEL_VAR = TypeVar("EDIT_MODEL_VAR", bound=BaseSchema)
+STATEMENT_VAR = TypeVar("STATEMENT_VAR", bound=Executable)
 
 
 class BaseDbRepository(GenericRepository[MODEL_VAR], ABC):
@@ -51,6 +69,7 @@ class BaseDbRepository(GenericRepository[MODEL_VAR], ABC):
             log.exception("Error while uploading new object to database")
             raise
 
+    @observe_duration(DB_QUERY_DURATION, "add")
     async def add(
         self,
         obj_new: MODEL_VAR,
@@ -69,27 +88,358 @@ class BaseDbRepository(GenericRepository[MODEL_VAR], ABC):
             log.exception("Error while uploading new object to database")
             raise
 
-    async def add_massive(self, models: Iterable[MODEL_VAR]) -> list[MODEL_VAR]:
+    def _to_insert_row(self, obj_new: MODEL_VAR) -> dict[str, Any]:
+        # Columns left empty are omitted so their SQL defaults apply.
+        row = {}
+        for column in self.model.__table__.columns:  # type: ignore
+            value = getattr(obj_new, column.key)
+            if value is None and (
+                column.default is not None or column.server_default is not None
+            ):
+                continue
+            row[column.key] = value
+        return row
+
+    async def _insert_chunk(
+        self, models: Iterable[MODEL_VAR], db_session: AsyncSession
+    ) -> list[MODEL_VAR]:
+        """Insert models with multi-row ``INSERT ... RETURNING`` statements."""
+        rows = [self._to_insert_row(await self._callback_before_add(m)) for m in models]
+        result = await db_session.scalars(
+            insert(self.model).returning(self.model, sort_by_parameter_order=True),
+            rows,
+        )
+        inserted_models = list(result.all())
+        # Keep the identity map small on large loads, without touching what
+        # the caller has in a shared session.
+        for obj in inserted_models:
+            db_session.expunge(obj)
+        return inserted_models
+
+    async def _copy_chunk(
+        self, models: Iterable[MODEL_VAR], db_session: AsyncSession
+    ) -> list[MODEL_VAR]:
+        """Insert models with asyncpg ``COPY``, defaults are filled client side."""
+        table = self.model.__table__  # type: ignore
+        created_at = datetime.now(UTC)
+        copied_models, records = [], []
+        for model in models:
+            model = await self._callback_before_add(model)
+            if model.created_at is None:
+                model.created_at = created_at
+            copied_models.append(model)
+            records.append(tuple(getattr(model, c.key) for c in table.columns))
+        connection = await db_session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(  # type: ignore
+            table.name,
+            records=records,
+            columns=[column.name for column in table.columns],
+            schema_name=table.schema,
+        )
+        return copied_models
+
+    async def _add_massive(
+        self,
+        models: Iterable[MODEL_VAR],
+        db_session: AsyncSession,
+        chunk_size: int,
+        use_copy: bool,
+    ) -> list[MODEL_VAR]:
+        add_chunk = self._copy_chunk if use_copy else self._insert_chunk
         added_models: list[MODEL_VAR] = []
+        for chunk in batched(models, chunk_size):
+            added_models.extend(await add_chunk(chunk, db_session))
+        return added_models
+
+    @observe_duration(DB_QUERY_DURATION, "add_massive")
+    async def add_massive(
+        self,
+        models: Iterable[MODEL_VAR],
+        /,
+        session: Optional[AsyncSession] = None,
+        chunk_size: Optional[int] = None,
+        use_copy: bool = False,
+    ) -> list[MODEL_VAR]:
+        """Bulk insert models in chunks and return the persisted models.
+
+        Chunks are written with multi-row ``INSERT ... RETURNING``, or with
+        asyncpg ``COPY`` when ``use_copy`` is set. Without a ``session`` the
+        whole load is committed in one transaction.
+        """
+        chunk_size = chunk_size or AppSettings.database.BULK_INSERT_CHUNK_SIZE
+        if session:
+            added_models = await self._add_massive(
+                models, session, chunk_size, use_copy
+            )
+        else:
+            async with self.async_session_factory() as db_session:
+                added_models = await self._add_massive(
+                    models, db_session, chunk_size, use_copy
+                )
+                await db_session.commit()
+        log.info(f"Added {len(added_models)} models to database")
+        return added_models
+
+    @staticmethod
+    def _filter_kind(value: Any) -> str:
+        if isinstance(value, (list, set, tuple)):
+            return "in"
+        if value is None:
+            return "is_null"
+        return "eq"
+
+    def _build_query(self, shape: tuple[tuple[str, str], ...]) -> Select:
+        q = select(self.model).filter(col(self.model.deleted).is_(False))
+        for col_name, kind in shape:
+            col_field = col(getattr(self.model, col_name))
+            if kind == "in":
+                q = q.filter(col_field.in_(bindparam(f"f_{col_name}", expanding=True)))
+            elif kind == "is_null":
+                q = q.filter(col_field.is_(None))
+            else:
+                q = q.filter(col_field == bindparam(f"f_{col_name}"))
+        return q
+
+    def _cached_statement(
+        self, key: Hashable, build: Callable[[], STATEMENT_VAR]
+    ) -> STATEMENT_VAR:
+        return get_statement_cache().get_or_build((self.model, key), build)
+
+    def _get_query(
+        self,
+        params: dict[str, Any],
+        variant: Hashable = "get",
+        extend: Optional[Callable[[Select], Select]] = None,
+    ) -> tuple[Select, dict[str, Any]]:
+        """Return the cached statement for the filter shape and its values.
+
+        ``variant`` names the statement built by ``extend`` on top of the
+        filters, statements are cached per (model, variant, filter shape).
+        """
+        shape = tuple(
+            sorted((name, self._filter_kind(value)) for name, value in params.items())
+        )
+
+        def build() -> Select:
+            q = self._build_query(shape)
+            return extend(q) if extend else q
+
+        values: dict[str, Any] = {}
+        for name, kind in shape:
+            if kind == "in":
+                values[f"f_{name}"] = list(params[name])
+            elif kind == "eq":
+                values[f"f_{name}"] = params[name]
+        return self._cached_statement((variant, shape), build), values
+
+    def _order_by_clauses(self, order_by: tuple[str, ...]) -> list[Any]:
+        return [
+            (
+                col(getattr(self.model, name[1:])).desc()
+                if name.startswith("-")
+                else col(getattr(self.model, name))
+            )
+            for name in order_by
+        ]
+
+    def _get_select_query(
+        self,
+        params: dict[str, Any],
+        order_by: Optional[str | Sequence[str]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        fields: tuple[str, ...] = (),
+    ) -> tuple[Select, dict[str, Any]]:
+        order = (order_by,) if isinstance(order_by, str) else tuple(order_by or ())
+
+        def extend(q: Select) -> Select:
+            if fields:
+                q = q.with_only_columns(
+                    *(col(getattr(self.model, name)) for name in fields),
+                    maintain_column_froms=True,
+                )
+            if order:
+                q = q.order_by(*self._order_by_clauses(order))
+            if limit is not None:
+                q = q.limit(bindparam("q_limit"))
+            if offset is not None:
+                q = q.offset(bindparam("q_offset"))
+            return q
+
+        q, values = self._get_query(
+            params,
+            ("get", fields, order, limit is not None, offset is not None),
+            extend,
+        )
+        if limit is not None:
+            values["q_limit"] = limit
+        if offset is not None:
+            values["q_offset"] = offset
+        return q, values
+
+    @observe_duration(DB_QUERY_DURATION, "get")
+    async def get(
+        self,
+        order_by: Optional[str | Sequence[str]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        **params,
+    ) -> list[MODEL_VAR]:
+        """Return matching rows.
+
+        ``order_by`` takes column names, prefixed with ``-`` for descending
+        order.
+        """
+        q, values = self._get_select_query(params, order_by, limit, offset)
+        async with self.async_session_factory() as db_session:
+            return (await db_session.execute(q, values)).scalars().all()
+
+    async def get_first(
+        self, order_by: Optional[str | Sequence[str]] = None, **params
+    ) -> Optional[MODEL_VAR]:
+        result = await self.get(order_by=order_by, limit=1, **params)
+        return result[0] if result else None
+
+    async def get_one(
+        self, order_by: Optional[str | Sequence[str]] = None, **params
+    ) -> MODEL_VAR:
+        if (result := await self.get_first(order_by=order_by, **params)) is None:
+            raise ValueError
+        return result
+
+    @observe_duration(DB_QUERY_DURATION, "get_fields")
+    async def get_fields(
+        self,
+        *fields: str,
+        order_by: Optional[str | Sequence[str]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        as_dict: bool = False,
+        **params,
+    ) -> Sequence[Row[Any]] | Sequence[RowMapping]:
+        """Return only the named columns of matching rows.
+
+        Rows come back as named tuples, or as read-only mappings with
+        ``as_dict``, so no ORM entity is built per row.
+        """
+        q, values = self._get_select_query(params, order_by, limit, offset, fields)
+        async with self.async_session_factory() as db_session:
+            result = await db_session.execute(q, values)
+            return result.mappings().all() if as_dict else result.all()
+
+    @overload
+    async def get_dict_list(
+        self, key: str, **params: Any
+    ) -> dict[Any, list[MODEL_VAR]]:
+        """Return matching rows grouped by the value of the ``key`` column."""
+
+    @overload
+    async def get_dict_list(
+        self, key: str, *fields: str, **params: Any
+    ) -> dict[Any, list[Row[Any]]]:
+        """Load only ``fields`` (and ``key``) of matching rows, grouped by ``key``."""
+
+    async def get_dict_list(
+        self, key: str, *fields: str, **params: Any
+    ) -> dict[Any, list[MODEL_VAR]] | dict[Any, list[Row[Any]]]:
+        rows: Sequence[Any]
+        if fields:
+            if key not in fields:
+                fields = (key, *fields)
+            rows = await self.get_fields(*fields, **params)
+        else:
+            rows = await self.get(**params)
+        result: dict[Any, list[Any]] = {}
+        for row in rows:
+            result.setdefault(getattr(row, key), []).append(row)
+        return result
+
+    @overload
+    async def get_dict(self, key: str, **params: Any) -> dict[Any, MODEL_VAR]:
+        """Return matching rows indexed by the ``key`` column, first row wins."""
+
+    @overload
+    async def get_dict(
+        self, key: str, *fields: str, **params: Any
+    ) -> dict[Any, Row[Any]]:
+        """Load only ``fields`` (and ``key``) of matching rows, indexed by ``key``."""
+
+    async def get_dict(
+        self, key: str, *fields: str, **params: Any
+    ) -> dict[Any, MODEL_VAR] | dict[Any, Row[Any]]:
+        grouped: dict[Any, list[Any]] = await self.get_dict_list(key, *fields, **params)
+        return {k: v[0] for k, v in grouped.items()}
+
+    @observe_duration(DB_QUERY_DURATION, "exists")
+    async def exists(self, **params) -> bool:
+        """Return whether a matching row exists with ``SELECT EXISTS``."""
+        q, values = self._get_query(params, "exists", lambda q: select(q.exists()))
         async with self.async_session_factory() as db_session:
-            for model in models:
-                await self.add(model, session=db_session, with_commmit=False)
-            await db_session.commit()
-        log.info(
-            f"Added {len(models) if hasattr(models, '__len__') else ''} models to database"
+            return bool((await db_session.execute(q, values)).scalar())
+
+    @observe_duration(DB_QUERY_DURATION, "count")
+    async def count(self, **params) -> int:
+        """Return the number of matching rows with ``SELECT count(*)``."""
+        q, values = self._get_query(
+            params,
+            "count",
+            lambda q: q.with_only_columns(func.count(), maintain_column_froms=True),
         )
-        return added_models
+        async with self.async_session_factory() as db_session:
+            return (await db_session.execute(q, values)).scalar_one()
 
-    async def get(self, **params) -> list[MODEL_VAR]:
-        params = {} if not params else params
+    async def get_iter(
+        self,
+        batch_size: Optional[int] = None,
+        order_by: Optional[str | Sequence[str]] = None,
+        **params,
+    ) -> AsyncIterator[MODEL_VAR]:
+        """Stream matching rows through a server-side cursor.
+
+        Rows are fetched ``batch_size`` at a time, the session stays open
+        until the iteration is finished.
+        """
+        batch_size = batch_size or AppSettings.database.ITER_BATCH_SIZE
+        q, values = self._get_select_query(params, order_by)
         async with self.async_session_factory() as db_session:
-            q = select(self.model).filter(col(self.model.deleted).is_(False))
-            for col_name, value in params.items():
-                col_field = getattr(self.model, col_name)
-                if any(map(lambda x: isinstance(value, x), [list, set, tuple])):
-                    q = q.filter(col(col_field).in_(value))
-                elif value is None:
-                    q = q.filter(col(col_field).is_(value))
-                else:
-                    q = q.filter(col(col_field) == value)
-            return (await db_session.execute(q)).scalars().all()
+            result = await db_session.stream_scalars(
+                q, values, execution_options={"yield_per": batch_size}
+            )
+            async for obj in result:
+                yield obj
+
+    async def get_iter_by_keyset(
+        self, batch_size: Optional[int] = None, **params
+    ) -> AsyncIterator[MODEL_VAR]:
+        """Iterate matching rows in primary key order, one page per query.
+
+        Every page is a ``WHERE pk > :last ORDER BY pk LIMIT :batch_size``
+        query in its own short session, so long exports hold neither a
+        transaction nor a cursor open.
+        """
+        batch_size = batch_size or AppSettings.database.ITER_BATCH_SIZE
+        table = self.model.__table__  # type: ignore
+        primary_key = next(iter(table.primary_key.columns))
+        first_page_q, values = self._get_query(
+            params,
+            "keyset_first",
+            lambda q: q.order_by(primary_key).limit(bindparam("k_limit")),
+        )
+        next_page_q, _ = self._get_query(
+            params,
+            "keyset_next",
+            lambda q: q.filter(primary_key > bindparam("k_last"))
+            .order_by(primary_key)
+            .limit(bindparam("k_limit")),
+        )
+        page_q, values = first_page_q, {**values, "k_limit": batch_size}
+        while True:
+            async with self.async_session_factory() as db_session:
+                page = (await db_session.execute(page_q, values)).scalars().all()
+            for obj in page:
+                yield obj
+            if len(page) < batch_size:
+                return
+            page_q = next_page_q
+            values["k_last"] = getattr(page[-1], primary_key.key)
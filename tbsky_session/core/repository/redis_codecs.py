@@ -0,0 +1,171 @@
+import zlib
+from functools import cache
+from typing import Optional, Type, TypeVar
+
+import orjson
+
+from ..config import AppSettings
+from ..models import BaseRedisModel
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover
+    lz4_frame = None
+
+__all__ = [
+    "RedisCodec",
+    "JsonCodec",
+    "OrjsonCodec",
+    "MsgpackCodec",
+    "CompressedCodec",
+    "get_redis_codec",
+    "decode_redis_value",
+]
+
+
+MODEL_VAR = TypeVar("MODEL_VAR", bound=BaseRedisModel)
+
+# Untagged values are the plain ``model_dump_json`` documents written before
+# codecs existed, they always start with ``{``.
+LEGACY_JSON_PREFIX = ord("{")
+
+
+class RedisCodec:
+    """Turns redis models into stored values and back.
+
+    Every value but the legacy JSON starts with a one byte ``tag`` naming its
+    format, so values written by any codec can be read by all of them. The
+    ``key`` field is not stored, it is restored from the Redis key.
+    """
+
+    tag: int
+
+    def encode_payload(self, obj: BaseRedisModel) -> bytes:
+        raise NotImplementedError
+
+    def decode_payload(
+        self, model: Type[MODEL_VAR], payload: bytes, key: str
+    ) -> MODEL_VAR:
+        raise NotImplementedError
+
+    def encode(self, obj: BaseRedisModel) -> bytes:
+        return bytes((self.tag,)) + self.encode_payload(obj)
+
+    def decode(self, model: Type[MODEL_VAR], value: bytes, key: str) -> MODEL_VAR:
+        return decode_redis_value(model, value, key)
+
+
+class JsonCodec(RedisCodec):
+    """Untagged pydantic JSON, readable by releases without codecs."""
+
+    tag = LEGACY_JSON_PREFIX
+
+    def encode(self, obj: BaseRedisModel) -> bytes:
+        return obj.model_dump_json().encode()
+
+
+class OrjsonCodec(RedisCodec):
+    tag = 0x01
+
+    def encode_payload(self, obj: BaseRedisModel) -> bytes:
+        return orjson.dumps(obj.model_dump(exclude={"key"}))
+
+    def decode_payload(
+        self, model: Type[MODEL_VAR], payload: bytes, key: str
+    ) -> MODEL_VAR:
+        return model.model_validate({**orjson.loads(payload), "key": key})
+
+
+class MsgpackCodec(RedisCodec):
+    """MessagePack array of field values in declaration order."""
+
+    tag = 0x02
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("msgpack codec requires the 'msgpack' package")
+
+    @staticmethod
+    @cache
+    def _fields(model: Type[BaseRedisModel]) -> tuple[str, ...]:
+        return tuple(name for name in model.model_fields if name != "key")
+
+    def encode_payload(self, obj: BaseRedisModel) -> bytes:
+        values = obj.model_dump(mode="json", exclude={"key"})
+        return msgpack.packb([values[name] for name in self._fields(type(obj))])
+
+    def decode_payload(
+        self, model: Type[MODEL_VAR], payload: bytes, key: str
+    ) -> MODEL_VAR:
+        values = dict(zip(self._fields(model), msgpack.unpackb(payload)))
+        return model.model_validate({**values, "key": key})
+
+
+class CompressedCodec(RedisCodec):
+    """Compresses values of another codec once they reach ``min_size``."""
+
+    tags = {"zlib": 0x10, "lz4": 0x11}
+
+    def __init__(self, codec: RedisCodec, algorithm: str, min_size: int = 0):
+        if algorithm == "lz4" and lz4_frame is None:
+            raise RuntimeError("lz4 compression requires the 'lz4' package")
+        self.codec = codec
+        self.tag = self.tags[algorithm]
+        self.min_size = min_size
+        self._compress = lz4_frame.compress if algorithm == "lz4" else zlib.compress
+
+    def encode(self, obj: BaseRedisModel) -> bytes:
+        value = self.codec.encode(obj)
+        if len(value) < self.min_size:
+            return value
+        return bytes((self.tag,)) + self._compress(value)
+
+
+def decode_redis_value(model: Type[MODEL_VAR], value: bytes, key: str) -> MODEL_VAR:
+    """Decode a stored value written by any codec."""
+    tag, payload = value[0], value[1:]
+    if tag == LEGACY_JSON_PREFIX:
+        return model.model_validate_json(value)
+    if tag == OrjsonCodec.tag:
+        return _get_codec("orjson").decode_payload(model, payload, key)
+    if tag == MsgpackCodec.tag:
+        return _get_codec("msgpack").decode_payload(model, payload, key)
+    if tag == CompressedCodec.tags["zlib"]:
+        return decode_redis_value(model, zlib.decompress(payload), key)
+    if tag == CompressedCodec.tags["lz4"] and lz4_frame is not None:
+        return decode_redis_value(model, lz4_frame.decompress(payload), key)
+    raise ValueError(f"Unknown redis value format: {tag:#x}")
+
+
+@cache
+def _get_codec(name: str) -> RedisCodec:
+    codecs: dict[str, Type[RedisCodec]] = {
+        "json": JsonCodec,
+        "orjson": OrjsonCodec,
+        "msgpack": MsgpackCodec,
+    }
+    return codecs[name]()
+
+
+@cache
+def get_redis_codec(
+    name: Optional[str] = None,
+    compression: Optional[str] = None,
+    min_size: Optional[int] = None,
+) -> RedisCodec:
+    """Return the codec configured in settings, or the one named."""
+    settings = AppSettings.database
+    codec = _get_codec(name or settings.REDIS_CODEC)
+    compression = compression or settings.REDIS_COMPRESSION
+    if compression == "none":
+        return codec
+    return CompressedCodec(
+        codec,
+        compression,
+        settings.REDIS_COMPRESSION_MIN_BYTES if min_size is None else min_size,
+    )
@@ -1,12 +1,28 @@
 import logging
+import math
+import time
 from abc import ABC
-from typing import Callable, Optional, Type, TypeAlias, TypeVar
+from itertools import batched
+from typing import (
+    AsyncIterator,
+    Callable,
+    ClassVar,
+    Iterable,
+    Optional,
+    Type,
+    TypeAlias,
+    TypeVar,
+)
 
 from redis.asyncio.client import Pipeline, Redis
 
+from tbsky_session.core.config import AppSettings
+from tbsky_session.core.consts import NAMESPACE_INDEX_KEY_PREFIX
 from tbsky_session.core.db_session import get_redis_connection
+from tbsky_session.core.metrics import REDIS_COMMAND_DURATION, observe_duration
 from tbsky_session.core.models import BaseRedisModel
 from tbsky_session.core.repository import GenericRepository
+from tbsky_session.core.repository.redis_codecs import RedisCodec, get_redis_codec
 from tbsky_session.core.schema import BaseSchema
 
 log = logging.getLogger(__file__)
@@ -21,18 +37,63 @@ REDIS_CONNECTION: TypeAlias = Redis
 PIPELINE_SESSION: TypeAlias = Pipeline
 
 
-def pipeline_factory() -> PIPELINE_SESSION:
+def pipeline_factory(transaction: bool = True) -> PIPELINE_SESSION:
     connection = get_redis_connection()
-    return connection.pipeline(transaction=True)
+    return connection.pipeline(transaction=transaction)
+
+
+def namespace_index_key(key_prefix: str) -> str:
+    return f"{NAMESPACE_INDEX_KEY_PREFIX}{key_prefix}"
+
+
+def index_expiry(ttl: Optional[int]) -> float:
+    """Score of a namespace index member, the time its key expires at."""
+    return math.inf if ttl is None else time.time() + ttl
+
+
+def prune_namespace_index(
+    pipeline: PIPELINE_SESSION, key_prefix: str
+) -> PIPELINE_SESSION:
+    return pipeline.zremrangebyscore(
+        namespace_index_key(key_prefix), "-inf", time.time()
+    )
+
+
+async def count_namespace(redis_connection: REDIS_CONNECTION, key_prefix: str) -> int:
+    """Count the live keys of a namespace from its index.
+
+    Every key of a prefixed namespace is also a member of a sorted set scored
+    by its expiry, so expired members are dropped and the rest counted with
+    ``ZCARD`` in one round trip instead of scanning the keyspace.
+    """
+    pipeline = prune_namespace_index(
+        redis_connection.pipeline(transaction=False), key_prefix
+    )
+    pipeline.zcard(namespace_index_key(key_prefix))
+    _, count = await pipeline.execute()
+    return count
 
 
 class BaseRedisRepository(GenericRepository[MODEL_VAR], ABC):
     model: Type[MODEL_VAR]
 
+    # Namespace of the model's keys, e.g. ``blacklist:``. Methods take and
+    # return keys without it.
+    key_prefix: ClassVar[str] = ""
+
     redis_connection_factory: Callable[..., REDIS_CONNECTION] = (
         lambda _: get_redis_connection()
     )
-    pipeline_factory: Callable[..., PIPELINE_SESSION] = lambda _: pipeline_factory()
+    pipeline_factory: Callable[..., PIPELINE_SESSION] = (
+        lambda _, transaction=True: pipeline_factory(transaction)
+    )
+
+    def codec_factory(self) -> RedisCodec:
+        # Values are written with this codec, values of any codec can be read.
+        return get_redis_codec()
+
+    def _key(self, key: str) -> str:
+        return f"{self.key_prefix}{key}"
 
     async def _callback_before_add(self, obj_new: MODEL_VAR) -> MODEL_VAR:
         return obj_new
@@ -40,20 +101,32 @@ class BaseRedisRepository(GenericRepository[MODEL_VAR], ABC):
     async def _add(
         self,
         obj_new: MODEL_VAR,
-        db_session: PIPELINE_SESSION,
+        db_session: PIPELINE_SESSION | REDIS_CONNECTION,
         with_execute=False,
     ) -> MODEL_VAR:
         """Commit new object to the database."""
         obj_new = await self._callback_before_add(obj_new)
         try:
-            await db_session.set(obj_new.key, obj_new.model_dump_json())
-            if with_execute:
+            ttl = obj_new.get_ttl()
+            if ttl is not None and ttl <= 0:
+                log.debug(f"Skipped already expired entity: {obj_new.key}.")
+                return obj_new
+            await db_session.set(
+                self._key(obj_new.key), self.codec_factory().encode(obj_new), ex=ttl
+            )
+            if self.key_prefix:
+                await db_session.zadd(
+                    namespace_index_key(self.key_prefix),
+                    {obj_new.key: index_expiry(ttl)},
+                )
+            if with_execute and isinstance(db_session, Pipeline):
                 await db_session.execute()
             return obj_new
         except Exception:
             log.exception("Error while uploading new object to database")
             raise
 
+    @observe_duration(REDIS_COMMAND_DURATION, "add")
     async def add(
         self,
         obj_new: MODEL_VAR,
@@ -61,17 +134,124 @@ class BaseRedisRepository(GenericRepository[MODEL_VAR], ABC):
         pipeline: Optional[PIPELINE_SESSION] = None,
         with_execute=True,
     ) -> MODEL_VAR:
-        """Commit new object to the database."""
-        obj_new = await self._callback_before_add(obj_new)
+        """Commit new object to the database.
+
+        Without a ``pipeline`` the object is written with a plain ``SET``,
+        a single command needs no ``MULTI``/``EXEC`` around it. Prefixed
+        namespaces index the key as well, in the same round trip.
+        """
         if pipeline:
             return await self._add(obj_new, pipeline, with_execute)
+        if self.key_prefix:
+            return await self._add(obj_new, self.pipeline_factory(False), True)
         try:
-            return await self._add(obj_new, self.pipeline_factory(), with_execute)
+            return await self._add(obj_new, self.redis_connection_factory())
         except Exception:
             log.exception("Error while uploading new object to database")
             raise
 
+    @observe_duration(REDIS_COMMAND_DURATION, "add_massive")
+    async def add_massive(
+        self,
+        models: Iterable[MODEL_VAR],
+        /,
+        chunk_size: Optional[int] = None,
+        transaction: bool = False,
+    ) -> list[MODEL_VAR]:
+        """Write models with one pipelined round trip per chunk.
+
+        Chunks are sent without ``MULTI``/``EXEC`` unless ``transaction`` is
+        set, in which case every chunk is applied atomically.
+        """
+        chunk_size = chunk_size or AppSettings.database.REDIS_PIPELINE_CHUNK_SIZE
+        added_models: list[MODEL_VAR] = []
+        for chunk in batched(models, chunk_size):
+            pipeline = self.pipeline_factory(transaction)
+            for obj_new in chunk:
+                added_models.append(await self._add(obj_new, pipeline))
+            if self.key_prefix:
+                prune_namespace_index(pipeline, self.key_prefix)
+            await pipeline.execute()
+        log.info(f"Added {len(added_models)} models to redis")
+        return added_models
+
+    def _decode(self, key: str, value: bytes) -> MODEL_VAR:
+        return self.codec_factory().decode(self.model, value, key)
+
+    @observe_duration(REDIS_COMMAND_DURATION, "get")
     async def get(self, *keys: str) -> list[MODEL_VAR]:
         redis_connection = self.redis_connection_factory()
-        values = await redis_connection.mget(*keys)
-        return [self.model.model_validate_json(value) for value in values if value]
+        values = await redis_connection.mget(*map(self._key, keys))
+        return [self._decode(key, value) for key, value in zip(keys, values) if value]
+
+    @observe_duration(REDIS_COMMAND_DURATION, "get_first")
+    async def get_first(self, *keys: str) -> Optional[MODEL_VAR]:
+        redis_connection = self.redis_connection_factory()
+        values = await redis_connection.mget(*map(self._key, keys))
+        for key, value in zip(keys, values):
+            if value:
+                return self._decode(key, value)
+        return None
+
+    async def _scan_keys(self, count: int) -> AsyncIterator[bytes]:
+        redis_connection = self.redis_connection_factory()
+        async for key in redis_connection.scan_iter(
+            match=f"{self.key_prefix}*", count=count
+        ):
+            yield key
+
+    async def _get_scanned(self, keys: list[bytes]) -> list[MODEL_VAR]:
+        redis_connection = self.redis_connection_factory()
+        prefix_length = len(self.key_prefix)
+        return [
+            self._decode(key[prefix_length:].decode(), value)
+            for key, value in zip(keys, await redis_connection.mget(*keys))
+            if value
+        ]
+
+    async def get_iter(
+        self, batch_size: Optional[int] = None
+    ) -> AsyncIterator[MODEL_VAR]:
+        """Walk the model's namespace with ``SCAN``, one ``MGET`` per batch.
+
+        SCAN only guarantees to return keys present for the whole iteration,
+        a key may show up twice and keys expiring meanwhile are skipped.
+        """
+        batch_size = batch_size or AppSettings.database.REDIS_SCAN_COUNT
+        batch: list[bytes] = []
+        async for key in self._scan_keys(batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                for obj in await self._get_scanned(batch):
+                    yield obj
+                batch = []
+        if batch:
+            for obj in await self._get_scanned(batch):
+                yield obj
+
+    async def exists(self, *keys: str) -> bool:
+        """Return whether any of the given keys, or any key of the namespace, exists."""
+        return await self.count(*keys) > 0
+
+    @observe_duration(REDIS_COMMAND_DURATION, "count")
+    async def count(self, *keys: str) -> int:
+        """Count the given keys, or all keys of the namespace without any.
+
+        Given keys are counted with a single ``EXISTS``. Without a prefix the
+        namespace count is ``DBSIZE``, otherwise it comes from the namespace
+        index, see ``count_namespace``.
+        """
+        redis_connection = self.redis_connection_factory()
+        if keys:
+            return await redis_connection.exists(*map(self._key, keys))
+        if not self.key_prefix:
+            return await redis_connection.dbsize()
+        return await count_namespace(redis_connection, self.key_prefix)
+
+    @observe_duration(REDIS_COMMAND_DURATION, "delete")
+    async def delete(self, model: MODEL_VAR) -> None:
+        pipeline = self.pipeline_factory(False)
+        pipeline.delete(self._key(model.key))
+        if self.key_prefix:
+            pipeline.zrem(namespace_index_key(self.key_prefix), model.key)
+        await pipeline.execute()
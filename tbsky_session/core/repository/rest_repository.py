@@ -10,7 +10,12 @@ from fake_useragent import UserAgent
 from ..schema import BaseSchema
 from .abc_repository import EmptyRepository, GetRepository
 
-__all__ = ["BaseGetRestApiRepository", "BaseRestApiRepository"]
+__all__ = [
+    "BaseGetRestApiRepository",
+    "BaseRestApiRepository",
+    "get_global_requests_client",
+    "close_global_requests_client",
+]
 
 
 T = TypeVar("T", bound=BaseSchema)
@@ -34,6 +39,12 @@ def get_global_requests_client():
     )
 
 
+async def close_global_requests_client() -> None:
+    if get_global_requests_client.cache_info().currsize:
+        await get_global_requests_client().aclose()
+    get_global_requests_client.cache_clear()
+
+
 class BaseRestApiRepository(EmptyRepository[T]):
 
     @cached_property
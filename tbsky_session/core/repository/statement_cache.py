@@ -0,0 +1,56 @@
+from collections import OrderedDict
+from functools import cache
+from typing import Callable, Hashable
+
+from sqlalchemy import Executable
+
+from ..config import AppSettings
+from ..metrics import CACHE_LOOKUPS
+
+__all__ = ["StatementCache", "get_statement_cache"]
+
+_CACHE_HITS = CACHE_LOOKUPS.labels("statement", "hit")
+_CACHE_MISSES = CACHE_LOOKUPS.labels("statement", "miss")
+
+
+class StatementCache:
+    """LRU of prebuilt statements keyed by query shape.
+
+    Statements only hold bound parameters, so one instance serves every call
+    with the same shape and SQLAlchemy reuses its memoized cache key and
+    compiled form instead of rebuilding the query.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._statements: OrderedDict[Hashable, Executable] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get_or_build[S: Executable](self, key: Hashable, build: Callable[[], S]) -> S:
+        if (statement := self._statements.get(key)) is not None:
+            self._statements.move_to_end(key)
+            self.hits += 1
+            _CACHE_HITS.inc()
+            return statement  # type: ignore
+        self.misses += 1
+        _CACHE_MISSES.inc()
+        statement = build()
+        if self.maxsize > 0:
+            self._statements[key] = statement
+            if len(self._statements) > self.maxsize:
+                self._statements.popitem(last=False)
+        return statement
+
+
+@cache
+def get_statement_cache() -> StatementCache:
+    return StatementCache(maxsize=AppSettings.database.STATEMENT_CACHE_SIZE)
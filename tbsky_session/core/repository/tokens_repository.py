@@ -1,8 +1,192 @@
+import uuid
+from typing import Iterable, Optional
+
+from fastapi import HTTPException
+from redis.asyncio.client import Redis
+
+from ..config import AppSettings
+from ..consts import BLACKLIST_KEY_PREFIX, REFRESH_FAMILY_KEY_PREFIX
+from ..db_session import get_redis_connection
+from ..metrics import REDIS_COMMAND_DURATION, observe_duration
 from ..models.security import BlackListToken
-from .redis_repository import BaseRedisRepository
+from ..security import get_revoked_token_filter, get_token_digest, get_token_expires_in
+from .redis_repository import (
+    count_namespace,
+    index_expiry,
+    namespace_index_key,
+    prune_namespace_index,
+)
+
+__all__ = ["BlackListTokenRepository", "RefreshTokenFamilyRepository"]
+
+
+class BlackListTokenRepository:
+    """Blacklist of revoked tokens.
+
+    Entries are one byte markers under ``blacklist:<token digest>``, they can
+    be added, checked and counted but not read back as models, so this is not
+    a ``GenericRepository``. Every write goes through ``revoke`` and every
+    lookup of given tokens through ``check``, so the revoked token filter
+    always sees them.
+    """
+
+    key_prefix = BLACKLIST_KEY_PREFIX
+    marker = b"1"
+
+    def redis_connection_factory(self) -> Redis:
+        return get_redis_connection()
+
+    def _marker_key(self, digest: bytes) -> str:
+        return f"{self.key_prefix}{digest.hex()}"
+
+    async def add(self, model: BlackListToken) -> BlackListToken:
+        await self.revoke(model.access_token, model.refresh_token)
+        return model
+
+    async def add_massive(
+        self, models: Iterable[BlackListToken]
+    ) -> list[BlackListToken]:
+        added_models = list(models)
+        tokens = [
+            token
+            for obj_new in added_models
+            for token in (obj_new.access_token, obj_new.refresh_token)
+        ]
+        await self.revoke(*tokens)
+        return added_models
+
+    async def exists(self, *tokens: str) -> bool:
+        """Return whether any of the tokens, or any token without them, is revoked."""
+        if not tokens:
+            return await self.count() > 0
+        return any(await self.check(*tokens))
+
+    @observe_duration(REDIS_COMMAND_DURATION, "count")
+    async def count(self, *tokens: str) -> int:
+        """Count the revoked tokens among the given ones, or all markers."""
+        if tokens:
+            return sum(await self.check(*tokens))
+        return await count_namespace(self.redis_connection_factory(), self.key_prefix)
+
+    @observe_duration(REDIS_COMMAND_DURATION, "revoke")
+    async def revoke(self, *tokens: str) -> None:
+        """Blacklist tokens until they expire.
+
+        Only a one byte marker keyed by the token digest is stored, with a TTL
+        equal to the token's remaining lifetime. Already expired or invalid
+        tokens are skipped. Other instances learn about the revocation through
+        the revoked token filter channel.
+        """
+        revoked_token_filter = get_revoked_token_filter()
+        pipeline = self.redis_connection_factory().pipeline(transaction=False)
+        for token in tokens:
+            if expires_in := get_token_expires_in(token):
+                digest = get_token_digest(token)
+                revoked_token_filter.add(digest)
+                pipeline.set(self._marker_key(digest), self.marker, ex=expires_in)
+                pipeline.zadd(
+                    namespace_index_key(self.key_prefix),
+                    {digest.hex(): index_expiry(expires_in)},
+                )
+                pipeline.publish(revoked_token_filter.channel, digest.hex())
+        if len(pipeline):
+            await prune_namespace_index(pipeline, self.key_prefix).execute()
+
+    @observe_duration(REDIS_COMMAND_DURATION, "check")
+    async def check(self, *tokens: Optional[str]) -> list[bool]:
+        """Return whether each token is blacklisted.
+
+        Tokens the revoked token filter rules out are answered locally, the
+        rest are looked up in a single MGET.
+        """
+        revoked_token_filter = get_revoked_token_filter()
+        digests: dict[str, bytes] = {}
+        for token in tokens:
+            if token and revoked_token_filter.might_contain(
+                digest := get_token_digest(token)
+            ):
+                digests[token] = digest
+        if not digests:
+            return [False] * len(tokens)
+        values = await self.redis_connection_factory().mget(
+            *(self._marker_key(digest) for digest in digests.values())
+        )
+        revoked = set()
+        for token, value in zip(digests, values):
+            revoked_token_filter.record(value is not None)
+            if value is not None:
+                revoked.add(token)
+        return [token in revoked for token in tokens]
+
+
+# Advances the family in KEYS[1] when ARGV[1] is its current generation and
+# deletes the family on any other generation. Returns the new generation,
+# -1 for unknown families and -2 for reused tokens.
+ROTATE_FAMILY_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    return -1
+end
+if current ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return -2
+end
+local generation = tonumber(current) + 1
+redis.call('SET', KEYS[1], generation, 'EX', ARGV[2])
+return generation
+"""
+
+
+class RefreshTokenFamilyRepository:
+    """Rotation state of refresh tokens.
+
+    Refresh tokens carry a family id (``fam``) and a generation (``gen``).
+    Redis keeps only the current generation of each family, expiring with
+    the newest refresh token. Refreshing with the current token advances the
+    generation, presenting any older one revokes the whole family.
+    """
+
+    key_prefix = REFRESH_FAMILY_KEY_PREFIX
+
+    def redis_connection_factory(self) -> Redis:
+        return get_redis_connection()
+
+    def __init__(self):
+        self._rotate = self.redis_connection_factory().register_script(
+            ROTATE_FAMILY_SCRIPT
+        )
+
+    def _key(self, family: str) -> str:
+        return f"{self.key_prefix}{family}"
+
+    @staticmethod
+    def _ttl() -> int:
+        return max(AppSettings.security.REFRESH_TOKEN_EXPIRE_DAYS * 86400, 1)
 
-__all__ = ["BlackListTokenRepository"]
+    async def start(self) -> dict[str, str | int]:
+        """Open a new family, return the claims of its first refresh token."""
+        family = uuid.uuid4().hex
+        await self.redis_connection_factory().set(self._key(family), 0, ex=self._ttl())
+        return {"fam": family, "gen": 0}
 
+    async def rotate(self, payload: dict) -> dict[str, str | int]:
+        """Return the claims of the refresh token replacing ``payload``."""
+        family, generation = payload.get("fam"), payload.get("gen")
+        if not isinstance(family, str) or not isinstance(generation, int):
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+        new_generation = await self._rotate(
+            keys=[self._key(family)],
+            args=[generation, self._ttl()],
+            client=self.redis_connection_factory(),
+        )
+        if new_generation == -2:
+            raise HTTPException(
+                status_code=401, detail="Refresh token reused, please log in again"
+            )
+        if new_generation < 0:
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+        return {"fam": family, "gen": new_generation}
 
-class BlackListTokenRepository(BaseRedisRepository[BlackListToken]):
-    model = BlackListToken
+    async def revoke(self, *families: str) -> None:
+        if families:
+            await self.redis_connection_factory().delete(*map(self._key, families))
@@ -1,9 +1,33 @@
 __all__ = ["UserRepository"]
 
 
+from typing import Optional
+
+from sqlalchemy import Select, bindparam, func
+from sqlmodel import col, select
+
+from ..metrics import DB_QUERY_DURATION, observe_duration
 from ..models import User
 from ..repository import BaseDbRepository
 
 
 class UserRepository(BaseDbRepository[User]):
     model = User
+
+    def _build_get_by_email_query(self) -> Select:
+        return (
+            select(self.model)
+            .where(func.lower(col(self.model.email)) == func.lower(bindparam("email")))
+            .where(col(self.model.deleted).is_(False))
+            .limit(1)
+        )
+
+    @observe_duration(DB_QUERY_DURATION, "get_by_email")
+    async def get_by_email(self, email: str) -> Optional[User]:
+        """Return the active user with the email, ignoring case.
+
+        The filter mirrors the ``ux_users_email_lower_active`` index.
+        """
+        q = self._cached_statement("get_by_email", self._build_get_by_email_query)
+        async with self.async_session_factory() as db_session:
+            return (await db_session.execute(q, {"email": email})).scalars().first()
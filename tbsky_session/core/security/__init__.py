@@ -1,2 +1,4 @@
 from .password import *
 from .token import *
+from .revocation import *
+from .rate_limit import *
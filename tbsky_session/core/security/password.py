@@ -1,8 +1,22 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from functools import cache
+from typing import Callable
 
+from fastapi import HTTPException
 from passlib.context import CryptContext
 
-__all__ = ["PasswordTools"]
+from ..config import AppSettings
+from ..metrics import PASSWORD_HASHING_PENDING, PASSWORD_HASHING_QUEUED
+from ..tracing import traced
+
+__all__ = [
+    "PasswordTools",
+    "PasswordHashingPool",
+    "get_password_hashing_pool",
+    "shutdown_password_hashing_pool",
+]
 
 
 @cache
@@ -10,6 +24,87 @@ def get_pwd_context():
     return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def _get_password_hash(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+
+class PasswordHashingPool:
+    """Bounded worker pool for bcrypt work.
+
+    At most ``workers + queue_size`` jobs are admitted at once, further
+    callers are rejected with 503 instead of waiting in line.
+    """
+
+    def __init__(self, executor: Executor, workers: int, queue_size: int):
+        self.executor = executor
+        self.workers = workers
+        self.max_pending = workers + queue_size
+        self.pending = 0
+
+    @property
+    def queued(self) -> int:
+        return max(self.pending - self.workers, 0)
+
+    async def run[R](self, func: Callable[..., R], *args) -> R:
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy, please try again later",
+                headers={
+                    "Retry-After": str(
+                        AppSettings.security.PASSWORD_HASHING_RETRY_AFTER_SECONDS
+                    )
+                },
+            )
+        self._set_pending(self.pending + 1)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, func, *args
+            )
+        finally:
+            self._set_pending(self.pending - 1)
+
+    def _set_pending(self, pending: int) -> None:
+        self.pending = pending
+        PASSWORD_HASHING_PENDING.set(pending)
+        PASSWORD_HASHING_QUEUED.set(self.queued)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait)
+
+
+@cache
+def get_password_hashing_pool() -> PasswordHashingPool:
+    settings = AppSettings.security
+    executor: Executor
+    if settings.PASSWORD_HASHING_EXECUTOR == "process":
+        executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASHING_WORKERS)
+    else:
+        executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASHING_WORKERS,
+            thread_name_prefix="password-hashing",
+        )
+    return PasswordHashingPool(
+        executor,
+        workers=settings.PASSWORD_HASHING_WORKERS,
+        queue_size=settings.PASSWORD_HASHING_QUEUE_SIZE,
+    )
+
+
+async def shutdown_password_hashing_pool() -> None:
+    if get_password_hashing_pool.cache_info().currsize:
+        await asyncio.to_thread(get_password_hashing_pool().shutdown)
+    get_password_hashing_pool.cache_clear()
+
+
+# Executor threads and processes do not survive a fork.
+os.register_at_fork(after_in_child=get_password_hashing_pool.cache_clear)
+
+
 class PasswordTools:
     pwd_context = get_pwd_context()
 
@@ -75,6 +170,7 @@ class PasswordTools:
         return v
 
     @classmethod
+    @traced("bcrypt")
     def verify_password(cls, plain_password: str, hashed_password: str):
         """
         Verify a password against a hashed password.
@@ -89,6 +185,7 @@ class PasswordTools:
         return cls.pwd_context.verify(plain_password, hashed_password)
 
     @classmethod
+    @traced("bcrypt")
     def get_password_hash(cls, password: str):
         """
         Hash a password for storing.
@@ -100,3 +197,42 @@ class PasswordTools:
             A hashed version of the password.
         """
         return cls.pwd_context.hash(password)
+
+    @classmethod
+    @traced("bcrypt")
+    async def verify_password_async(
+        cls, plain_password: str, hashed_password: str
+    ) -> bool:
+        """
+        Verify a password against a hashed password in the hashing pool.
+
+        Args:
+            plain_password: The password in plain text.
+            hashed_password: The hashed password.
+
+        Returns:
+            True if the password matches, False otherwise.
+
+        Raises:
+            HTTPException: 503 if the hashing pool is saturated.
+        """
+        return await get_password_hashing_pool().run(
+            _verify_password, plain_password, hashed_password
+        )
+
+    @classmethod
+    @traced("bcrypt")
+    async def get_password_hash_async(cls, password: str) -> str:
+        """
+        Hash a password for storing in the hashing pool.
+
+        Args:
+            password: The password that needs a hash.
+
+        Returns:
+            A hashed version of the password.
+
+        Raises:
+            HTTPException: 503 if the hashing pool is saturated.
+        """
+        return await get_password_hashing_pool().run(_get_password_hash, password)
@@ -0,0 +1,160 @@
+import logging
+import math
+import time
+import uuid
+from functools import cache
+from typing import Awaitable, Callable, Optional
+
+from fastapi import HTTPException, Request
+from redis.exceptions import RedisError
+
+from ..config import AppSettings
+from ..consts import RATE_LIMIT_KEY_PREFIX
+from ..db_session import get_redis_connection
+
+log = logging.getLogger(__file__)
+
+__all__ = ["SlidingWindowRateLimiter", "get_rate_limiter", "rate_limit"]
+
+
+# Sliding log per key: a sorted set of request timestamps in milliseconds.
+# KEYS are the limited keys, ARGV is ``now, member`` followed by a ``limit,
+# window`` pair per key. A request is recorded only when every key admits it.
+# Returns the milliseconds each key stays blocked, 0 for keys under the limit.
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local retry_after = {}
+local blocked = false
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[1 + i * 2])
+    local window = tonumber(ARGV[2 + i * 2])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    retry_after[i] = 0
+    if redis.call('ZCARD', key) >= limit then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        retry_after[i] = math.max(tonumber(oldest[2]) + window - now, 1)
+        blocked = true
+    end
+end
+if not blocked then
+    for i, key in ipairs(KEYS) do
+        redis.call('ZADD', key, now, ARGV[2])
+        redis.call('PEXPIRE', key, ARGV[2 + i * 2])
+    end
+end
+return retry_after
+"""
+
+
+class SlidingWindowRateLimiter:
+    """Sliding window limits evaluated by one Lua script per request.
+
+    Keys Redis reported as blocked are remembered in process until their
+    block ends, further requests for them are rejected without Redis.
+    """
+
+    def __init__(self, max_blocked_keys: int = 10_000):
+        self.max_blocked_keys = max_blocked_keys
+        self.local_rejections = 0
+        self._blocked_until: dict[str, float] = {}
+        # The limiter outlives clients, every call passes the current one.
+        self._script = get_redis_connection().register_script(SLIDING_WINDOW_SCRIPT)
+
+    def _local_retry_after(self, keys: list[str]) -> float:
+        now = time.monotonic()
+        retry_after = 0.0
+        for key in keys:
+            blocked_until = self._blocked_until.get(key)
+            if blocked_until is None:
+                continue
+            if blocked_until <= now:
+                del self._blocked_until[key]
+            else:
+                retry_after = max(retry_after, blocked_until - now)
+        return retry_after
+
+    def _block(self, key: str, seconds: float) -> None:
+        now = time.monotonic()
+        if len(self._blocked_until) >= self.max_blocked_keys:
+            self._blocked_until = {
+                k: until for k, until in self._blocked_until.items() if until > now
+            }
+            if len(self._blocked_until) >= self.max_blocked_keys:
+                return
+        self._blocked_until[key] = now + seconds
+
+    async def hit(self, limits: dict[str, tuple[int, float]]) -> float:
+        """Record a request against every key, ``limits`` maps a key to its
+        ``(requests, window seconds)``.
+
+        Return 0 when the request is admitted, otherwise the seconds until it
+        would be.
+        """
+        keys = list(limits)
+        if retry_after := self._local_retry_after(keys):
+            self.local_rejections += 1
+            return retry_after
+        args: list = [int(time.time() * 1000), uuid.uuid4().hex]
+        for requests, window in limits.values():
+            args += [requests, int(window * 1000)]
+        retry_after_ms = await self._script(
+            keys=keys, args=args, client=get_redis_connection()
+        )
+        for key, key_retry_after_ms in zip(keys, retry_after_ms):
+            if key_retry_after_ms:
+                self._block(key, key_retry_after_ms / 1000)
+        return max(retry_after_ms, default=0) / 1000
+
+
+@cache
+def get_rate_limiter() -> SlidingWindowRateLimiter:
+    return SlidingWindowRateLimiter()
+
+
+async def _get_email(request: Request) -> Optional[str]:
+    # FastAPI already read the body for the endpoint, ``json()`` is cached.
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    email = body.get("email") if isinstance(body, dict) else None
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+def rate_limit(scope: str) -> Callable[[Request], Awaitable[None]]:
+    """Return a dependency limiting requests of ``scope`` per IP and email.
+
+    It rejects with 429 before the endpoint runs, so throttled requests never
+    reach the password hashing. Requests are let through when Redis fails.
+    """
+
+    async def dependency(request: Request) -> None:
+        settings = AppSettings.security
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        limits: dict[str, tuple[int, float]] = {}
+        if request.client:
+            limits[f"{RATE_LIMIT_KEY_PREFIX}{scope}:ip:{request.client.host}"] = (
+                settings.RATE_LIMIT_IP_REQUESTS,
+                settings.RATE_LIMIT_IP_WINDOW_SECONDS,
+            )
+        if email := await _get_email(request):
+            limits[f"{RATE_LIMIT_KEY_PREFIX}{scope}:email:{email}"] = (
+                settings.RATE_LIMIT_EMAIL_REQUESTS,
+                settings.RATE_LIMIT_EMAIL_WINDOW_SECONDS,
+            )
+        if not limits:
+            return
+        try:
+            retry_after = await get_rate_limiter().hit(limits)
+        except RedisError:
+            log.exception("Rate limiter is unavailable, request let through")
+            return
+        if retry_after:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    return dependency
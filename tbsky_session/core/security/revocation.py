@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import math
+from functools import cache
+from typing import Iterator, Optional
+
+from redis.asyncio.client import Redis
+
+from ..config import AppSettings
+from ..consts import BLACKLIST_CHANNEL, BLACKLIST_KEY_PREFIX
+from ..db_session import get_redis_connection
+from ..metrics import CACHE_LOOKUPS
+
+log = logging.getLogger(__file__)
+
+__all__ = ["BloomFilter", "RevokedTokenFilter", "get_revoked_token_filter"]
+
+_DEFINITE_NEGATIVES = CACHE_LOOKUPS.labels("blacklist_filter", "negative")
+_TRUE_POSITIVES = CACHE_LOOKUPS.labels("blacklist_filter", "true_positive")
+_FALSE_POSITIVES = CACHE_LOOKUPS.labels("blacklist_filter", "false_positive")
+
+
+class BloomFilter:
+    """Bloom filter over token digests, indexes come from double hashing."""
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        self.capacity = capacity
+        self.size = max(
+            int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2), 8
+        )
+        self.hash_count = max(round(self.size / capacity * math.log(2)), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _indexes(self, digest: bytes) -> Iterator[int]:
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, digest: bytes) -> None:
+        for index in self._indexes(digest):
+            self._bits[index >> 3] |= 1 << (index & 7)
+        self.count += 1
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(
+            self._bits[index >> 3] & (1 << (index & 7))
+            for index in self._indexes(digest)
+        )
+
+    @property
+    def expected_false_positive_rate(self) -> float:
+        return (
+            1 - math.exp(-self.hash_count * self.count / self.size)
+        ) ** self.hash_count
+
+
+class RevokedTokenFilter:
+    """In-process negative cache in front of the token blacklist.
+
+    A digest missing from the filter is certainly not revoked, so such checks
+    are answered without Redis. Instances share revocations through a Redis
+    pub/sub channel and rebuild the filter from the blacklist keys
+    periodically. Until the first rebuild finished every check falls through
+    to Redis.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        false_positive_rate: float,
+        rebuild_interval: float,
+        key_prefix: str = BLACKLIST_KEY_PREFIX,
+        channel: str = BLACKLIST_CHANNEL,
+    ):
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.rebuild_interval = rebuild_interval
+        self.key_prefix = key_prefix
+        self.channel = channel
+
+        self.ready = False
+        self.definite_negatives = 0
+        self.true_positives = 0
+        self.false_positives = 0
+
+        self._bloom = BloomFilter(capacity, false_positive_rate)
+        self._next_bloom: Optional[BloomFilter] = None
+        self._rebuild_lock = asyncio.Lock()
+
+    @property
+    def expected_false_positive_rate(self) -> float:
+        return self._bloom.expected_false_positive_rate
+
+    @property
+    def observed_false_positive_rate(self) -> float:
+        negatives = self.false_positives + self.definite_negatives
+        return self.false_positives / negatives if negatives else 0.0
+
+    def add(self, digest: bytes) -> None:
+        self._bloom.add(digest)
+        if self._next_bloom is not None:
+            self._next_bloom.add(digest)
+
+    def might_contain(self, digest: bytes) -> bool:
+        if not self.ready or digest in self._bloom:
+            return True
+        self.definite_negatives += 1
+        _DEFINITE_NEGATIVES.inc()
+        return False
+
+    def record(self, revoked: bool) -> None:
+        """Record the Redis answer for a digest the filter let through."""
+        if not self.ready:
+            return
+        if revoked:
+            self.true_positives += 1
+            _TRUE_POSITIVES.inc()
+        else:
+            self.false_positives += 1
+            _FALSE_POSITIVES.inc()
+
+    async def rebuild(self, redis: Redis) -> None:
+        """Replace the filter with one built from the live blacklist keys."""
+        async with self._rebuild_lock:
+            bloom = self._next_bloom = BloomFilter(
+                self.capacity, self.false_positive_rate
+            )
+            try:
+                prefix_length = len(self.key_prefix)
+                async for key in redis.scan_iter(
+                    match=f"{self.key_prefix}*",
+                    count=AppSettings.database.REDIS_SCAN_COUNT,
+                ):
+                    bloom.add(bytes.fromhex(key[prefix_length:].decode()))
+                if bloom.count > self.capacity:
+                    log.warning(
+                        f"Revoked token filter holds {bloom.count} digests, "
+                        f"over its capacity of {self.capacity}"
+                    )
+                self._bloom, self.ready = bloom, True
+            finally:
+                self._next_bloom = None
+
+    async def _listen(self, redis: Redis) -> None:
+        pubsub = redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            # Subscribe first so no revocation is lost while rebuilding.
+            await self.rebuild(redis)
+            while True:
+                # An explicit timeout keeps the socket timeout from tearing
+                # down an idle subscription.
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                if message and message["type"] == "message":
+                    self.add(bytes.fromhex(message["data"].decode()))
+        finally:
+            self.ready = False
+            await pubsub.reset()
+
+    async def sync(self) -> None:
+        """Keep the filter in sync with the blacklist until cancelled."""
+        redis = get_redis_connection()
+        while True:
+            listener = asyncio.create_task(self._listen(redis))
+            try:
+                while not listener.done():
+                    await asyncio.wait({listener}, timeout=self.rebuild_interval)
+                    if not listener.done():
+                        await self.rebuild(redis)
+                listener.result()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Revoked token filter lost sync, retrying")
+                await asyncio.sleep(1)
+            finally:
+                listener.cancel()
+
+
+@cache
+def get_revoked_token_filter() -> RevokedTokenFilter:
+    settings = AppSettings.security
+    return RevokedTokenFilter(
+        capacity=settings.BLACKLIST_FILTER_CAPACITY,
+        false_positive_rate=settings.BLACKLIST_FILTER_FALSE_POSITIVE_RATE,
+        rebuild_interval=settings.BLACKLIST_FILTER_REBUILD_SECONDS,
+    )
@@ -1,15 +1,93 @@
-from datetime import UTC, datetime, timedelta
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+from functools import cache
 from typing import Any
 
-import dateparser
 import jwt
 from fastapi import HTTPException
 
 from ..config import AppSettings
+from ..consts import ACCESS_TOKEN_TYPE, REFRESH_TOKEN_TYPE
+from ..metrics import CACHE_LOOKUPS
+from ..tracing import traced
 
 REDIS_SECURITY_KEY = "security"
 
-__all__ = ["create_access_token", "decode_jwt_token", "create_refresh_token"]
+__all__ = [
+    "create_access_token",
+    "decode_jwt_token",
+    "create_refresh_token",
+    "get_token_digest",
+    "get_token_expires_in",
+    "get_verified_token_cache",
+    "VerifiedTokenCache",
+]
+
+_CACHE_HITS = CACHE_LOOKUPS.labels("verified_token", "hit")
+_CACHE_MISSES = CACHE_LOOKUPS.labels("verified_token", "miss")
+
+
+def get_token_digest(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+class VerifiedTokenCache:
+    """LRU of payloads of tokens whose signature was already verified.
+
+    An entry lives for at most ``ttl`` seconds and never past the ``exp``
+    claim of its token.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, digest: bytes) -> dict | None:
+        entry = self._entries.get(digest)
+        if entry is not None:
+            expires_at, payload = entry
+            if time.time() < expires_at:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                _CACHE_HITS.inc()
+                return payload
+            del self._entries[digest]
+        self.misses += 1
+        _CACHE_MISSES.inc()
+        return None
+
+    def set(self, digest: bytes, payload: dict) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[digest] = (min(time.time() + self.ttl, payload["exp"]), payload)
+        self._entries.move_to_end(digest)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+@cache
+def get_verified_token_cache() -> VerifiedTokenCache:
+    return VerifiedTokenCache(
+        maxsize=AppSettings.security.TOKEN_CACHE_SIZE,
+        ttl=AppSettings.security.TOKEN_CACHE_TTL_SECONDS,
+    )
 
 
 def create_jwt_token(data: dict) -> str:
@@ -20,54 +98,66 @@ def create_jwt_token(data: dict) -> str:
     )
 
 
+@traced("jwt")
 def decode_jwt_token(token: str) -> dict:
+    verified_token_cache = get_verified_token_cache()
+    digest = get_token_digest(token)
+    if (payload := verified_token_cache.get(digest)) is None:
+        try:
+            payload = jwt.decode(
+                token,
+                AppSettings.security.SECRET_KEY.get_secret_value(),
+                algorithms=[AppSettings.security.JWT_ALGORITHM],
+                options={"require": ["exp", "iat"]},
+            )
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(
+                status_code=401, detail="Token expired, please log in again"
+            )
+        except jwt.InvalidTokenError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        verified_token_cache.set(digest, payload)
+    return dict(payload)
+
+
+def get_token_expires_in(token: str) -> int:
+    """Return the remaining lifetime of a valid token, 0 for unusable ones."""
     try:
-        payload: dict = jwt.decode(
-            token,
-            AppSettings.security.SECRET_KEY.get_secret_value(),
-            algorithms=[AppSettings.security.JWT_ALGORITHM],
-        )
-        expire = dateparser.parse(payload.pop("expire"))
-        if expire is None:
-            raise jwt.InvalidTokenError
-        if datetime.now(UTC).replace(tzinfo=None) > expire:
-            raise jwt.ExpiredSignatureError
-        return payload
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(
-            status_code=401, detail="Token expired, please log in again"
-        )
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        payload = decode_jwt_token(token)
+    except HTTPException:
+        return 0
+    return max(int(payload["exp"] - time.time()), 0)
+
+
+def _create_token(to_encode: dict[str, Any], expires_delta: timedelta, token_type: str):
+    issued_at = int(time.time())
+    expires_in = int(expires_delta.total_seconds())
+    # ``jti`` keeps tokens issued to the same subject in the same second
+    # apart, they are blacklisted and cached by their digest.
+    to_encode.update(
+        {
+            "typ": token_type,
+            "iat": issued_at,
+            "exp": issued_at + expires_in,
+            "jti": uuid.uuid4().hex,
+        }
+    )
+    return create_jwt_token(to_encode), expires_in
 
 
 def create_access_token(
     to_encode: dict[str, Any], expires_delta: timedelta | None = None
 ):
-    if expires_delta:
-        expire = datetime.now(UTC).replace(tzinfo=None) + expires_delta
-    else:
-        expire = datetime.now(UTC).replace(tzinfo=None) + timedelta(
+    if expires_delta is None:
+        expires_delta = timedelta(
             minutes=AppSettings.security.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode.update({"expire": str(expire)})
-    return (
-        create_jwt_token(to_encode),
-        (expire - datetime.now(UTC).replace(tzinfo=None)).seconds,
-    )
+    return _create_token(to_encode, expires_delta, ACCESS_TOKEN_TYPE)
 
 
 def create_refresh_token(
     to_encode: dict[str, Any], expires_delta: timedelta | None = None
 ):
-    if expires_delta:
-        expire = datetime.now(UTC).replace(tzinfo=None) + expires_delta
-    else:
-        expire = datetime.now(UTC).replace(tzinfo=None) + timedelta(
-            days=AppSettings.security.REFRESH_TOKEN_EXPIRE_DAYS
-        )
-    to_encode.update({"expire": str(expire)})
-    return (
-        create_jwt_token(to_encode),
-        (expire - datetime.now(UTC).replace(tzinfo=None)).seconds,
-    )
+    if expires_delta is None:
+        expires_delta = timedelta(days=AppSettings.security.REFRESH_TOKEN_EXPIRE_DAYS)
+    return _create_token(to_encode, expires_delta, REFRESH_TOKEN_TYPE)
@@ -1,2 +1,3 @@
 from .abc_service import *
 from .resource import *
+from .response import *
@@ -1,9 +1,11 @@
+import uuid
 from typing import Optional
 
 from fastapi import Cookie, Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 
-from ..models import User
+from ..consts import ACCESS_TOKEN_TYPE
+from ..models import User, UserPrincipal
 from ..repository import BlackListTokenRepository, UserRepository
 from ..security import decode_jwt_token
 
@@ -18,17 +20,24 @@ async def get_user_by_access_token(
     refresh_token: Optional[str] = Cookie(None),
     user_repository: UserRepository = Depends(),
     black_list_token_repository: BlackListTokenRepository = Depends(),
-) -> User:
+) -> User | UserPrincipal:
     if access_token := (access_token_from_header or access_token):
         access_token_payload = decode_jwt_token(access_token)
+        if access_token_payload.get("typ") != ACCESS_TOKEN_TYPE:
+            raise HTTPException(status_code=401, detail="Invalid access token")
         user_id: str = access_token_payload.get("sub")  # type: ignore
 
-        if await black_list_token_repository.get(access_token):
+        access_token_revoked, refresh_token_revoked = (
+            await black_list_token_repository.check(access_token, refresh_token)
+        )
+        if access_token_revoked:
             raise HTTPException(status_code=401, detail="Invalid access token")
-        if refresh_token and await black_list_token_repository.get(refresh_token):
+        if refresh_token_revoked:
             raise HTTPException(status_code=401, detail="Invalid refresh token")
 
-        if user := (await user_repository.get_first(user_id=user_id)):
+        if principal := UserPrincipal.from_claims(access_token_payload):
+            return principal
+        if user := (await user_repository.get_first(user_id=uuid.UUID(user_id))):
             return user
         raise HTTPException(
             status_code=401,
@@ -44,4 +53,4 @@ class PublicResource:
 
 
 class ProtectedResource(PublicResource):
-    user: User = Depends(get_user_by_access_token)
+    user: User | UserPrincipal = Depends(get_user_by_access_token)
@@ -0,0 +1,197 @@
+import logging
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import Any, Callable, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import AppSettings
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover
+    otel_trace = None
+
+log = logging.getLogger(__file__)
+
+__all__ = [
+    "RequestTimings",
+    "TimingSpan",
+    "get_request_timings",
+    "start_request_timings",
+    "reset_request_timings",
+    "traced",
+    "instrument_engine",
+    "configure_span_export",
+    "export_request_spans",
+]
+
+
+class TimingSpan(NamedTuple):
+    name: str
+    start_ns: int
+    end_ns: int
+
+
+class RequestTimings:
+    """Spans recorded while serving one sampled request."""
+
+    __slots__ = ("start_ns", "spans")
+
+    def __init__(self):
+        self.start_ns = time.time_ns()
+        self.spans: list[TimingSpan] = []
+
+    def add(self, name: str, start_ns: int, end_ns: int) -> None:
+        self.spans.append(TimingSpan(name, start_ns, end_ns))
+
+    def server_timing(self) -> str:
+        """Render spans summed up by name as a ``Server-Timing`` value."""
+        totals: dict[str, list[int]] = {}
+        for span in self.spans:
+            total = totals.setdefault(span.name, [0, 0])
+            total[0] += span.end_ns - span.start_ns
+            total[1] += 1
+        metrics = [
+            f'{name};dur={duration / 1e6:.2f};desc="{count}x"'
+            for name, (duration, count) in totals.items()
+        ]
+        metrics.append(f"app;dur={(time.time_ns() - self.start_ns) / 1e6:.2f}")
+        return ", ".join(metrics)
+
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def get_request_timings() -> Optional[RequestTimings]:
+    return _request_timings.get()
+
+
+def start_request_timings() -> Optional[RequestTimings]:
+    """Sample the current request, return its timings when it is traced."""
+    sample_rate = AppSettings.server.TIMING_SAMPLE_RATE
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        return None
+    timings = RequestTimings()
+    _request_timings.set(timings)
+    return timings
+
+
+def reset_request_timings() -> None:
+    _request_timings.set(None)
+
+
+def traced[F: Callable[..., Any]](name: str) -> Callable[[F], F]:
+    """Record calls of a function as ``name`` spans of sampled requests.
+
+    Unsampled requests pay for a single context variable lookup.
+    """
+
+    def decorator(func: F) -> F:
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if (timings := _request_timings.get()) is None:
+                    return await func(*args, **kwargs)
+                start_ns = time.time_ns()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    timings.add(name, start_ns, time.time_ns())
+
+            return async_wrapper  # type: ignore
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if (timings := _request_timings.get()) is None:
+                return func(*args, **kwargs)
+            start_ns = time.time_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.add(name, start_ns, time.time_ns())
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+# The start time lives on the execution context, so a failing statement
+# leaves nothing behind on the connection.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    if context is not None and _request_timings.get() is not None:
+        context._query_start_ns = time.time_ns()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    _add_query_span(context)
+
+
+def _handle_error(exception_context) -> None:
+    _add_query_span(exception_context.execution_context)
+
+
+def _add_query_span(context) -> None:
+    timings = _request_timings.get()
+    query_start_ns = getattr(context, "_query_start_ns", None)
+    if timings is not None and query_start_ns is not None:
+        timings.add("db", query_start_ns, time.time_ns())
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record every statement run on ``engine`` as a ``db`` span, failed ones too."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def configure_span_export() -> bool:
+    """Export sampled requests to an OTLP collector when it is configured.
+
+    Needs ``opentelemetry-sdk`` and ``opentelemetry-exporter-otlp-proto-http``,
+    without them export stays off.
+    """
+    settings = AppSettings.server
+    if not settings.OTEL_EXPORT_ENABLED:
+        return False
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        log.warning("OpenTelemetry SDK is not installed, span export is off")
+        return False
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME})
+    )
+    provider.add_span_processor(
+        BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.OTEL_EXPORT_ENDPOINT))
+    )
+    otel_trace.set_tracer_provider(provider)  # type: ignore
+    return True
+
+
+def export_request_spans(
+    name: str, timings: RequestTimings, attributes: dict[str, Any]
+) -> None:
+    """Hand a finished request and its spans to the OpenTelemetry tracer."""
+    if otel_trace is None:
+        return
+    tracer = otel_trace.get_tracer(__name__)
+    root = tracer.start_span(name, start_time=timings.start_ns, attributes=attributes)
+    context = otel_trace.set_span_in_context(root)
+    for span in timings.spans:
+        tracer.start_span(span.name, context=context, start_time=span.start_ns).end(
+            end_time=span.end_ns
+        )
+    root.end()
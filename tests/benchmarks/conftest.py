@@ -0,0 +1,60 @@
+import json
+import timeit
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+
+
+class Benchmark:
+    """Times a callable and compares it with its stored baseline.
+
+    Timings are the best of ``repeat`` runs of as many calls as fit in about
+    0.2 seconds, in seconds per call.
+    """
+
+    def __init__(self, baselines: dict[str, float], tolerance: float, save: bool):
+        self.baselines = baselines
+        self.tolerance = tolerance
+        self.save = save
+        self.results: dict[str, float] = {}
+
+    def __call__(self, name: str, func: Callable[[], object], repeat: int = 7):
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        seconds = min(timer.repeat(repeat, number)) / number
+        self.results[name] = seconds
+
+        baseline = self.baselines.get(name)
+        reference = f"{baseline * 1e6:.2f} us" if baseline else "none"
+        print(f"\n{name}: {seconds * 1e6:.2f} us, baseline {reference}")
+        if baseline and not self.save:
+            limit = baseline * (1 + self.tolerance)
+            assert seconds <= limit, (
+                f"{name} takes {seconds * 1e6:.2f} us, "
+                f"over {limit * 1e6:.2f} us allowed by its baseline"
+            )
+        return seconds
+
+
+@pytest.fixture(scope="session")
+def benchmark_session(request):
+    baselines = (
+        json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    )
+    benchmark = Benchmark(
+        baselines,
+        tolerance=request.config.getoption("--benchmark-tolerance"),
+        save=request.config.getoption("--benchmark-save"),
+    )
+    yield benchmark
+    if benchmark.save and benchmark.results:
+        baselines.update(benchmark.results)
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True))
+
+
+@pytest.fixture
+def benchmark(benchmark_session) -> Benchmark:
+    return benchmark_session
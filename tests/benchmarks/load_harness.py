@@ -0,0 +1,211 @@
+"""In-process load test of the session API against local stand-ins.
+
+The app from ``init_fastapi_server`` is driven through the httpx ASGI
+transport, Postgres is replaced by SQLite through ``aiosqlite`` and Redis by
+``fakeredis``, so the numbers only depend on the app and the machine. Every
+virtual user registers, logs in, reads ``/users/me``, refreshes its tokens and
+logs out::
+
+    python -m tests.benchmarks.load_harness --users 500 --concurrency 50
+
+Rate limiting is switched off, every virtual user shares one client address.
+"""
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import ExitStack, asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, NamedTuple
+from unittest import mock
+
+import httpx
+from fakeredis import FakeAsyncRedis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from tbsky_session.api import init_fastapi_server
+from tbsky_session.core import (
+    AppSettings,
+    get_async_engine,
+    get_async_session_factory,
+    get_rate_limiter,
+    get_redis_connection,
+)
+
+PASSWORD = "Password_123"
+ENDPOINTS = ("register", "login", "users/me", "refresh", "logout")
+
+
+class EndpointReport(NamedTuple):
+    endpoint: str
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p99_ms: float
+
+
+def _patch_everywhere(stack: ExitStack, original: object, replacement: object):
+    # Getters are imported by name all over the package, so every module
+    # holding a reference gets the stand-in.
+    for module in list(sys.modules.values()):
+        if not getattr(module, "__name__", "").startswith("tbsky_session"):
+            continue
+        for name, value in list(vars(module).items()):
+            if value is original:
+                stack.enter_context(mock.patch.object(module, name, replacement))
+
+
+@asynccontextmanager
+async def local_backends() -> AsyncIterator[None]:
+    """Serve the database from a temporary SQLite file and Redis in process."""
+    with tempfile.TemporaryDirectory() as directory, ExitStack() as stack:
+        async_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{Path(directory) / 'session.db'}"
+        )
+        async_session_factory = async_sessionmaker(
+            bind=async_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        redis = FakeAsyncRedis()
+        _patch_everywhere(stack, get_async_engine, lambda: async_engine)
+        _patch_everywhere(
+            stack, get_async_session_factory, lambda: async_session_factory
+        )
+        _patch_everywhere(stack, get_redis_connection, lambda: redis)
+        stack.enter_context(
+            mock.patch.object(AppSettings.security, "RATE_LIMIT_ENABLED", False)
+        )
+        get_rate_limiter.cache_clear()
+
+        from tbsky_session import models  # noqa
+        from tbsky_session.core import models as core_models  # noqa
+
+        async with async_engine.begin() as async_conn:
+            await async_conn.run_sync(SQLModel.metadata.create_all)
+        try:
+            yield
+        finally:
+            await redis.close()
+            await async_engine.dispose()
+
+
+async def _virtual_user(
+    transport: httpx.ASGITransport,
+    user_ids: itertools.count,
+    users: int,
+    latencies: dict[str, list[float]],
+    errors: dict[str, int],
+) -> None:
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://testserver/api/v1"
+    ) as client:
+        while (user_id := next(user_ids)) < users:
+            email = f"load-{user_id}@example.com"
+            requests = (
+                (
+                    "register",
+                    "POST",
+                    "/security/register",
+                    {
+                        "first_name": "Load",
+                        "last_name": "Tester",
+                        "email": email,
+                        "password": PASSWORD,
+                    },
+                ),
+                (
+                    "login",
+                    "POST",
+                    "/security/login",
+                    {
+                        "email": email,
+                        "password": PASSWORD,
+                    },
+                ),
+                ("users/me", "GET", "/users/me", None),
+                ("refresh", "POST", "/security/refresh_token", None),
+                ("logout", "POST", "/security/logout", None),
+            )
+            for endpoint, method, url, body in requests:
+                started_at = time.perf_counter()
+                response = await client.request(method, url, json=body)
+                latencies[endpoint].append(time.perf_counter() - started_at)
+                if response.is_error:
+                    errors[endpoint] += 1
+
+
+async def run_load(users: int, concurrency: int) -> list[EndpointReport]:
+    """Run ``users`` virtual users, ``concurrency`` of them at a time."""
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    async with local_backends():
+        transport = httpx.ASGITransport(app=init_fastapi_server())
+        user_ids = itertools.count()
+        started_at = time.perf_counter()
+        await asyncio.gather(
+            *(
+                _virtual_user(transport, user_ids, users, latencies, errors)
+                for _ in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started_at
+
+    latencies["total"] = [
+        latency for endpoint in ENDPOINTS for latency in latencies[endpoint]
+    ]
+    errors["total"] = sum(errors.values())
+    reports = []
+    for endpoint in (*ENDPOINTS, "total"):
+        endpoint_latencies = latencies[endpoint]
+        percentiles = statistics.quantiles(
+            endpoint_latencies, n=100, method="inclusive"
+        )
+        reports.append(
+            EndpointReport(
+                endpoint=endpoint,
+                requests=len(endpoint_latencies),
+                errors=errors[endpoint],
+                rps=len(endpoint_latencies) / elapsed,
+                p50_ms=percentiles[49] * 1000,
+                p99_ms=percentiles[98] * 1000,
+            )
+        )
+    return reports
+
+
+def format_reports(reports: list[EndpointReport]) -> str:
+    lines = [
+        f"{'endpoint':<10} {'requests':>8} {'errors':>6} "
+        f"{'rps':>9} {'p50 ms':>9} {'p99 ms':>9}"
+    ]
+    lines.extend(
+        f"{report.endpoint:<10} {report.requests:>8} {report.errors:>6} "
+        f"{report.rps:>9.1f} {report.p50_ms:>9.2f} {report.p99_ms:>9.2f}"
+        for report in reports
+    )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--users", type=int, default=200, help="virtual users, at least 2"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=20, help="virtual users at a time"
+    )
+    args = parser.parse_args()
+    print(format_reports(asyncio.run(run_load(args.users, args.concurrency))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import pytest
+from load_harness import format_reports, run_load
+
+pytestmark = pytest.mark.benchmark
+
+
+async def test_load_harness():
+    # when
+    reports = await run_load(users=10, concurrency=5)
+    print(f"\n{format_reports(reports)}")
+    # then
+    assert all(report.requests == 10 for report in reports[:-1])
+    assert not any(report.errors for report in reports)
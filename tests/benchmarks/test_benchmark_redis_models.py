@@ -0,0 +1,58 @@
+import pytest
+
+from tbsky_session.core import (
+    BlackListToken,
+    CompressedCodec,
+    JsonCodec,
+    MsgpackCodec,
+    OrjsonCodec,
+    create_access_token,
+    create_refresh_token,
+)
+
+pytestmark = pytest.mark.benchmark
+
+# msgpack and lz4 come with the optional ``speedups`` extra.
+CODECS = {
+    "json": ((), JsonCodec),
+    "orjson": ((), OrjsonCodec),
+    "msgpack": (("msgpack",), MsgpackCodec),
+    "msgpack+lz4": (
+        ("msgpack", "lz4"),
+        lambda: CompressedCodec(MsgpackCodec(), "lz4"),
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def blacklist_token() -> BlackListToken:
+    access_token, _ = create_access_token({"sub": "user_id"})
+    refresh_token, _ = create_refresh_token({"sub": "user_id"})
+    return BlackListToken(access_token=access_token, refresh_token=refresh_token)
+
+
+@pytest.fixture(params=CODECS)
+def codec(request):
+    requirements, factory = CODECS[request.param]
+    for module in requirements:
+        pytest.importorskip(module)
+    return request.param, factory()
+
+
+class TestBlackListTokenBenchmarks:
+
+    def test_encode(self, benchmark, blacklist_token, codec):
+        name, codec = codec
+        benchmark(
+            f"blacklist_token_encode[{name}]", lambda: codec.encode(blacklist_token)
+        )
+
+    def test_decode(self, benchmark, blacklist_token, codec):
+        # given
+        name, codec = codec
+        value = codec.encode(blacklist_token)
+        # then
+        benchmark(
+            f"blacklist_token_decode[{name}]",
+            lambda: codec.decode(BlackListToken, value, blacklist_token.key),
+        )
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from tbsky_session.api import init_fastapi_server
+from tbsky_session.core import User, trusted_response
+from tbsky_session.schemas.users import UserOut
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.fixture(scope="module")
+def user() -> User:
+    return User(
+        first_name="John",
+        last_name="Smith",
+        email="john.smith@example.com",
+        hashed_password="hashed_password",
+    )
+
+
+@pytest.fixture(scope="module")
+def users_me_route() -> APIRoute:
+    app = init_fastapi_server()
+    return next(
+        route
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.path == "/api/v1/users/me"
+    )
+
+
+class TestResponseBenchmarks:
+
+    def test_users_me_response(self, benchmark, user, users_me_route):
+        # given
+        loop = asyncio.new_event_loop()
+
+        async def validated():
+            # What FastAPI does with a returned object and ``response_model``.
+            content = await serialize_response(
+                field=users_me_route.secure_cloned_response_field,
+                response_content=user,
+            )
+            return JSONResponse(content)
+
+        async def trusted():
+            return trusted_response(UserOut, user)
+
+        # when
+        validated_seconds = benchmark(
+            "users_me_response[validated]",
+            lambda: loop.run_until_complete(validated()),
+        )
+        trusted_seconds = benchmark(
+            "users_me_response[trusted]",
+            lambda: loop.run_until_complete(trusted()),
+        )
+        # then
+        trusted_body = loop.run_until_complete(trusted()).body
+        assert trusted_body == loop.run_until_complete(validated()).body
+        assert trusted_seconds < validated_seconds
+        loop.close()
@@ -0,0 +1,87 @@
+import pytest
+
+from tbsky_session.core import (
+    PasswordTools,
+    User,
+    create_access_token,
+    decode_jwt_token,
+    get_verified_token_cache,
+)
+from tbsky_session.schemas import UserCreate
+
+pytestmark = pytest.mark.benchmark
+
+PASSWORD = "Password_123"
+USER_FIELDS = {
+    "first_name": "John",
+    "last_name": "Smith",
+    "email": "john.smith@example.com",
+}
+
+
+@pytest.fixture(scope="module")
+def hashed_password() -> str:
+    return PasswordTools.get_password_hash(PASSWORD)
+
+
+class TestTokenBenchmarks:
+
+    def test_create_access_token(self, benchmark):
+        benchmark("create_access_token", lambda: create_access_token({"sub": "id"}))
+
+    def test_decode_jwt_token(self, benchmark):
+        # given
+        access_token, _ = create_access_token({"sub": "id"})
+        verified_token_cache = get_verified_token_cache()
+
+        def decode():
+            verified_token_cache.clear()
+            decode_jwt_token(access_token)
+
+        # then
+        benchmark("decode_jwt_token", decode)
+
+    def test_decode_jwt_token_cached(self, benchmark):
+        # given
+        access_token, _ = create_access_token({"sub": "id"})
+        decode_jwt_token(access_token)
+        # then
+        benchmark("decode_jwt_token_cached", lambda: decode_jwt_token(access_token))
+
+
+class TestPasswordBenchmarks:
+
+    def test_validate_password(self, benchmark):
+        benchmark(
+            "validate_password", lambda: PasswordTools.validate_password(PASSWORD)
+        )
+
+    def test_verify_password(self, benchmark, hashed_password):
+        benchmark(
+            "verify_password",
+            lambda: PasswordTools.verify_password(PASSWORD, hashed_password),
+            repeat=3,
+        )
+
+
+class TestUserBenchmarks:
+
+    def test_construct_user(self, benchmark, hashed_password):
+        benchmark(
+            "construct_user",
+            lambda: User(**USER_FIELDS, hashed_password=hashed_password),
+        )
+
+    def test_validate_user(self, benchmark):
+        # Validation hashes the password, as registration does.
+        benchmark(
+            "validate_user",
+            lambda: User.model_validate({**USER_FIELDS, "hashed_password": PASSWORD}),
+            repeat=3,
+        )
+
+    def test_validate_user_create(self, benchmark):
+        benchmark(
+            "validate_user_create",
+            lambda: UserCreate.model_validate({**USER_FIELDS, "password": PASSWORD}),
+        )
@@ -0,0 +1,30 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark")
+    group.addoption(
+        "--benchmark",
+        action="store_true",
+        help="run the benchmarks and compare them with the stored baselines",
+    )
+    group.addoption(
+        "--benchmark-save",
+        action="store_true",
+        help="run the benchmarks and store the timings as the new baselines",
+    )
+    group.addoption(
+        "--benchmark-tolerance",
+        type=float,
+        default=1.0,
+        help="allowed slowdown against a baseline, 1.0 fails at twice the baseline",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark") or config.getoption("--benchmark-save"):
+        return
+    skip_benchmark = pytest.mark.skip(reason="benchmarks run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
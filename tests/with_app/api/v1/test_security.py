@@ -25,10 +25,60 @@ class TestAuthResource:
         assert response.status_code == 200
         assert response.json() is None
 
+    async def test_register_taken_email(self, client: TestClient):
+        # given
+        await UserRepository().add(
+            User(
+                first_name="Test",
+                last_name="Test",
+                email="taken@example.com",
+                hashed_password="A_Bdv7`82T+t",
+            )
+        )
+        user_data = {
+            "first_name": "Test",
+            "last_name": "Test",
+            "email": "Taken@Example.com",
+            "password": "A_Bdv7`82T+t",
+        }
+        # when
+        response = client.post(
+            "api/v1/security/register",
+            json=user_data,
+        )
+        # then
+        assert response.status_code == 409
+        assert response.json() == {"detail": "Email is already registered"}
+
+    async def test_register_email_of_deleted_user(self, client: TestClient):
+        # given
+        await UserRepository().add(
+            User(
+                first_name="Test",
+                last_name="Test",
+                email="deleted@example.com",
+                hashed_password="A_Bdv7`82T+t",
+                deleted=True,
+            )
+        )
+        user_data = {
+            "first_name": "Test",
+            "last_name": "Test",
+            "email": "deleted@example.com",
+            "password": "A_Bdv7`82T+t",
+        }
+        # when
+        response = client.post(
+            "api/v1/security/register",
+            json=user_data,
+        )
+        # then
+        assert response.status_code == 200
+
     async def test_login(self, client: TestClient):
         # given
         user_data = {
-            "email": "test@example.com",
+            "email": "login@example.com",
             "password": "A_Bdv7`82T+t",
         }
         user_repo = UserRepository()
@@ -36,7 +86,7 @@ class TestAuthResource:
             User(
                 first_name="Test",
                 last_name="Test",
-                email="test@example.com",
+                email="login@example.com",
                 hashed_password="A_Bdv7`82T+t",
             )
         )
@@ -48,3 +98,99 @@ class TestAuthResource:
         # then
         assert response.status_code == 200
         assert response.json() is None
+
+
+def register(client: TestClient, email: str) -> None:
+    response = client.post(
+        "api/v1/security/register",
+        json={
+            "first_name": "Test",
+            "last_name": "Test",
+            "email": email,
+            "password": "A_Bdv7`82T+t",
+        },
+    )
+    assert response.status_code == 200
+
+
+class TestTokenRotation:
+
+    def test_refresh_rotates_both_tokens(self, auth_client: TestClient):
+        # given
+        register(auth_client, "rotate@example.com")
+        access_token = auth_client.cookies["access_token"]
+        refresh_token = auth_client.cookies["refresh_token"]
+        # when
+        response = auth_client.post("api/v1/security/refresh_token")
+        # then
+        assert response.status_code == 200
+        assert auth_client.cookies["access_token"] != access_token
+        assert auth_client.cookies["refresh_token"] != refresh_token
+        assert auth_client.get("api/v1/users/me").status_code == 200
+
+    def test_reused_refresh_token_revokes_the_family(self, auth_client: TestClient):
+        # given
+        register(auth_client, "reuse@example.com")
+        stolen_refresh_token = auth_client.cookies["refresh_token"]
+        auth_client.post("api/v1/security/refresh_token")
+        current_refresh_token = auth_client.cookies["refresh_token"]
+        # when
+        auth_client.cookies.set("refresh_token", stolen_refresh_token)
+        response = auth_client.post("api/v1/security/refresh_token")
+        # then
+        assert response.status_code == 401
+        assert response.json() == {
+            "detail": "Refresh token reused, please log in again"
+        }
+        auth_client.cookies.set("refresh_token", current_refresh_token)
+        assert auth_client.post("api/v1/security/refresh_token").status_code == 401
+
+    def test_access_token_does_not_start_a_new_family(self, auth_client: TestClient):
+        # given
+        register(auth_client, "valid-access@example.com")
+        stolen_refresh_token = auth_client.cookies["refresh_token"]
+        auth_client.post("api/v1/security/refresh_token")
+        auth_client.cookies.set("refresh_token", stolen_refresh_token)
+        assert auth_client.post("api/v1/security/refresh_token").status_code == 401
+        # when
+        response = auth_client.post("api/v1/security/access_token")
+        # then
+        assert response.status_code == 200
+        assert "access_token" in response.cookies
+        assert "refresh_token" not in response.cookies
+        assert auth_client.post("api/v1/security/refresh_token").status_code == 401
+
+    def test_access_token_is_not_a_refresh_token(self, auth_client: TestClient):
+        # given
+        register(auth_client, "access-as-refresh@example.com")
+        auth_client.cookies.set("refresh_token", auth_client.cookies["access_token"])
+        # when
+        response = auth_client.post("api/v1/security/refresh_token")
+        # then
+        assert response.status_code == 401
+        assert response.json() == {"detail": "Invalid refresh token"}
+
+    def test_refresh_token_is_not_an_access_token(self, auth_client: TestClient):
+        # given
+        register(auth_client, "refresh-as-access@example.com")
+        auth_client.cookies.set("access_token", auth_client.cookies["refresh_token"])
+        # when
+        response = auth_client.get("api/v1/users/me")
+        # then
+        assert response.status_code == 401
+        assert response.json() == {"detail": "Invalid access token"}
+
+    def test_logout_revokes_both_tokens(self, auth_client: TestClient):
+        # given
+        register(auth_client, "logout@example.com")
+        access_token = auth_client.cookies["access_token"]
+        refresh_token = auth_client.cookies["refresh_token"]
+        # when
+        response = auth_client.post("api/v1/security/logout")
+        # then
+        assert response.status_code == 200
+        for access_cookie in (access_token, refresh_token):
+            auth_client.cookies.set("access_token", access_cookie)
+            auth_client.cookies.set("refresh_token", refresh_token)
+            assert auth_client.get("api/v1/users/me").status_code == 401
+        assert auth_client.post("api/v1/security/refresh_token").status_code == 401
@@ -36,3 +36,9 @@ async def db_session():
 def client(app: FastAPI, user_id, db_session) -> TestClient:
     app.dependency_overrides[get_user_by_access_token] = lambda: user_id
     return TestClient(app)
+
+
+@pytest.fixture
+def auth_client(app: FastAPI, db_session) -> TestClient:
+    """Client authenticated by the cookies the app sets."""
+    return TestClient(app)
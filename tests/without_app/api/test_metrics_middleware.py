@@ -0,0 +1,43 @@
+import httpx
+
+from tbsky_session.api import init_fastapi_server
+from tbsky_session.core import AppSettings
+
+
+class TestMetricsMiddleware:
+
+    async def test_requests_show_up_in_the_metrics(self, monkeypatch):
+        # given
+        monkeypatch.setattr(AppSettings.server, "METRICS_ENABLED", True)
+        transport = httpx.ASGITransport(app=init_fastapi_server())
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://testserver"
+        ) as client:
+            await client.get("/api/v1/users/me")
+            await client.get("/session/missing")
+            # when
+            response = await client.get("/session/metrics")
+        # then
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        lines = response.text.splitlines()
+        assert any(
+            line.startswith(
+                'http_requests_total{method="GET",'
+                'route="/api/v1/users/me",status="401"}'
+            )
+            for line in lines
+        )
+        assert any(
+            line.startswith(
+                'http_requests_total{method="GET",route="<unmatched>",status="404"}'
+            )
+            for line in lines
+        )
+        assert any(
+            line.startswith(
+                "http_request_duration_seconds_count{"
+                'method="GET",route="/api/v1/users/me"}'
+            )
+            for line in lines
+        )
@@ -0,0 +1,58 @@
+import httpx
+
+from tbsky_session.api import init_fastapi_server
+from tbsky_session.core import (
+    AppSettings,
+    User,
+    UserRepository,
+    create_access_token,
+    instrument_engine,
+)
+
+
+class TestServerTimingMiddleware:
+
+    async def test_sampled_responses_break_down_database_time(
+        self, db, redis, monkeypatch
+    ):
+        # given
+        monkeypatch.setattr(AppSettings.server, "TIMING_SAMPLE_RATE", 1)
+        instrument_engine(db.sync_engine)
+        user = await UserRepository().add(
+            User(
+                first_name="First",
+                last_name="Last",
+                email="timing@example.com",
+                hashed_password="hashed_password",
+            )
+        )
+        access_token, _ = create_access_token({"sub": str(user.user_id)})
+        transport = httpx.ASGITransport(app=init_fastapi_server())
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://testserver"
+        ) as client:
+            # when
+            response = await client.get(
+                "/api/v1/users/me",
+                headers={"Authorization": f"Bearer {access_token}"},
+            )
+        # then
+        assert response.status_code == 200
+        metrics = {
+            metric.split(";")[0]: metric
+            for metric in response.headers["Server-Timing"].split(", ")
+        }
+        assert {"db", "jwt", "app"} <= metrics.keys()
+        assert metrics["db"].endswith('desc="1x"')
+
+    async def test_unsampled_responses_have_no_breakdown(self, monkeypatch):
+        # given
+        monkeypatch.setattr(AppSettings.server, "TIMING_SAMPLE_RATE", 0)
+        transport = httpx.ASGITransport(app=init_fastapi_server())
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://testserver"
+        ) as client:
+            # when
+            response = await client.get("/api/v1/users/me")
+        # then
+        assert "Server-Timing" not in response.headers
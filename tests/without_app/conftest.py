@@ -0,0 +1,56 @@
+import sys
+
+import pytest
+from fakeredis import FakeAsyncRedis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from tbsky_session.core import (
+    get_async_engine,
+    get_async_session_factory,
+    get_redis_connection,
+    get_revoked_token_filter,
+)
+
+
+def patch_everywhere(monkeypatch, original: object, replacement: object) -> None:
+    """Replace ``original`` in every module of the package that imported it."""
+    for module in list(sys.modules.values()):
+        if not getattr(module, "__name__", "").startswith("tbsky_session"):
+            continue
+        for name, value in list(vars(module).items()):
+            if value is original:
+                monkeypatch.setattr(module, name, replacement)
+
+
+@pytest.fixture
+async def redis(monkeypatch):
+    redis = FakeAsyncRedis()
+    patch_everywhere(monkeypatch, get_redis_connection, lambda: redis)
+    get_revoked_token_filter.cache_clear()
+    yield redis
+    await redis.flushall()
+    await redis.close()
+    get_revoked_token_filter.cache_clear()
+
+
+@pytest.fixture
+async def db(monkeypatch, tmp_path):
+    """Serve the repositories from a SQLite file instead of Postgres."""
+    from tbsky_session import models  # noqa
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite'}")
+    async_session_factory = async_sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    patch_everywhere(monkeypatch, get_async_engine, lambda: async_engine)
+    patch_everywhere(
+        monkeypatch, get_async_session_factory, lambda: async_session_factory
+    )
+    async with async_engine.begin() as async_conn:
+        await async_conn.run_sync(SQLModel.metadata.create_all)
+    yield async_engine
+    await async_engine.dispose()
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeConnection
+from redis.exceptions import ConnectionError
+
+from tbsky_session.core import InstrumentedConnectionPool
+
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+
+@pytest.fixture
+async def connection_pool(server):
+    connection_pool = InstrumentedConnectionPool(
+        connection_class=FakeConnection,
+        server=server,
+        max_connections=1,
+        timeout=0.1,
+    )
+    yield connection_pool
+    await connection_pool.disconnect()
+
+
+class TestInstrumentedConnectionPool:
+
+    async def test_counts_connections_in_use_and_waiting(self, connection_pool):
+        # given
+        connection = await connection_pool.get_connection("PING")
+        waiting = asyncio.create_task(connection_pool.get_connection("PING"))
+        await asyncio.sleep(0.01)
+        # when
+        statistics = connection_pool.statistics()
+        # then
+        assert (statistics.created, statistics.in_use, statistics.idle) == (1, 1, 0)
+        assert statistics.waiters == 1
+        await connection_pool.release(connection)
+        await connection_pool.release(await waiting)
+        statistics = connection_pool.statistics()
+        assert (statistics.in_use, statistics.idle, statistics.waiters) == (0, 1, 0)
+        assert statistics.acquisitions == 2
+
+    async def test_counts_timed_out_checkouts(self, connection_pool):
+        # given
+        connection = await connection_pool.get_connection("PING")
+        # when
+        with pytest.raises(ConnectionError):
+            await connection_pool.get_connection("PING")
+        # then
+        statistics = connection_pool.statistics()
+        assert (statistics.acquisitions, statistics.acquire_timeouts) == (1, 1)
+        assert statistics.connect_failures == 0
+        assert statistics.acquire_seconds_total >= 0.1
+        assert statistics.waiters == 0
+        await connection_pool.release(connection)
+
+    async def test_counts_connect_failures_apart(self, connection_pool, server):
+        # given
+        server.connected = False
+        # when
+        with pytest.raises(ConnectionError):
+            await connection_pool.get_connection("PING")
+        # then
+        statistics = connection_pool.statistics()
+        assert (statistics.connect_failures, statistics.acquire_timeouts) == (1, 0)
+        assert (statistics.acquisitions, statistics.in_use) == (0, 0)
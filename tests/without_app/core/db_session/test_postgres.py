@@ -0,0 +1,120 @@
+import asyncio
+import sys
+
+import pytest
+from sqlalchemy import Index, inspect
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+
+from tbsky_session.core import (
+    AppSettings,
+    InstrumentedQueuePool,
+    dispose_async_engine,
+    get_async_engine,
+    initialize_database,
+    warm_up_database,
+)
+
+
+class TestInstrumentedQueuePool:
+
+    async def test_counts_checkouts_waiting_for_a_connection(self, tmp_path):
+        # given
+        async_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+        )
+        pool = async_engine.pool
+        async with async_engine.connect():
+            # when
+            waiting = asyncio.create_task(async_engine.connect().__aenter__())
+            await asyncio.sleep(0.05)
+            # then
+            assert pool.waiters == 1
+            assert pool.checkedout() == 1
+        connection = await waiting
+        assert pool.waiters == 0
+        await connection.close()
+        await async_engine.dispose()
+
+
+class TestInitializeDatabase:
+
+    async def test_matching_fingerprint_skips_create_all(self, db, mocker):
+        # given
+        await initialize_database()
+        create_all = mocker.spy(SQLModel.metadata, "create_all")
+        # when
+        await initialize_database()
+        # then
+        assert create_all.call_count == 0
+
+    async def test_changed_model_creates_the_schema_again(self, db, mocker):
+        # given
+        await initialize_database()
+        create_all = mocker.spy(SQLModel.metadata, "create_all")
+        users = SQLModel.metadata.tables["users"]
+        index = Index("ix_users_first_name", users.c.first_name)
+        # when
+        try:
+            await initialize_database()
+        finally:
+            users.indexes.discard(index)
+        # then
+        assert create_all.call_count == 1
+        async with db.connect() as async_conn:
+            indexes = await async_conn.run_sync(
+                lambda conn: inspect(conn).get_indexes("users")
+            )
+        assert "ix_users_first_name" in {index["name"] for index in indexes}
+
+
+@pytest.fixture
+async def pooled_engine(monkeypatch, tmp_path):
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=5,
+    )
+    monkeypatch.setattr(
+        sys.modules[warm_up_database.__module__],
+        "get_async_engine",
+        lambda: async_engine,
+    )
+    yield async_engine
+    await async_engine.dispose()
+
+
+class TestWarmUpDatabase:
+
+    async def test_opens_the_configured_connections(self, pooled_engine, monkeypatch):
+        # given
+        monkeypatch.setattr(AppSettings.database, "WARMUP_CONNECTIONS", 3)
+        # when
+        await warm_up_database()
+        # then
+        assert pooled_engine.pool.checkedin() == 3
+        assert pooled_engine.pool.checkedout() == 0
+
+    async def test_opens_no_more_connections_than_the_pool_keeps(
+        self, pooled_engine, monkeypatch
+    ):
+        # given
+        monkeypatch.setattr(AppSettings.database, "POOL_SIZE", 2)
+        # when
+        await warm_up_database(connections=4)
+        # then
+        assert pooled_engine.pool.checkedin() == 2
+
+
+class TestDisposeAsyncEngine:
+
+    async def test_drops_the_process_wide_engine(self):
+        # given
+        get_async_engine()
+        # when
+        await dispose_async_engine()
+        # then
+        assert get_async_engine.cache_info().currsize == 0
@@ -0,0 +1,88 @@
+import time
+import uuid
+
+import pytest
+
+from tbsky_session.core import AppSettings, User, UserPrincipal
+
+
+@pytest.fixture
+def principal_claims(monkeypatch):
+    monkeypatch.setattr(AppSettings.security, "PRINCIPAL_CLAIMS_ENABLED", True)
+
+
+def make_payload(user: User, **claims) -> dict:
+    return {
+        "sub": str(user.user_id),
+        "iat": int(time.time()),
+        **UserPrincipal.to_claims(user),
+        **claims,
+    }
+
+
+def make_user() -> User:
+    return User(
+        user_id=uuid.uuid4(),
+        first_name="First",
+        last_name="Last",
+        email="user@example.com",
+        hashed_password="hashed_password",
+    )
+
+
+class TestUserPrincipal:
+
+    def test_claims_round_trip(self, principal_claims):
+        # given
+        user = make_user()
+        # when
+        principal = UserPrincipal.from_claims(make_payload(user))
+        # then
+        assert principal == UserPrincipal(
+            user_id=user.user_id,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            email=user.email,
+        )
+
+    def test_disabled_claims_are_not_issued_nor_trusted(self):
+        # given
+        user = make_user()
+        # then
+        assert UserPrincipal.to_claims(user) == {}
+        assert UserPrincipal.from_claims(make_payload(user, pcv=1)) is None
+
+    @pytest.mark.parametrize(
+        "claims",
+        [
+            {"pcv": 0},
+            {"pcv": None},
+            {"sub": "not-a-uuid"},
+            {"sub": None},
+            {"iat": "yesterday"},
+        ],
+    )
+    def test_garbage_claims_are_not_trusted(self, principal_claims, claims):
+        # when
+        principal = UserPrincipal.from_claims(make_payload(make_user(), **claims))
+        # then
+        assert principal is None
+
+    @pytest.mark.parametrize("claim", ["sub", "iat", "fn", "ln", "em"])
+    def test_missing_claims_are_not_trusted(self, principal_claims, claim):
+        # given
+        payload = make_payload(make_user())
+        del payload[claim]
+        # when
+        principal = UserPrincipal.from_claims(payload)
+        # then
+        assert principal is None
+
+    def test_claims_are_not_trusted_after_max_age(self, principal_claims):
+        # given
+        max_age = AppSettings.security.PRINCIPAL_CLAIMS_MAX_AGE_SECONDS
+        payload = make_payload(make_user(), iat=int(time.time()) - max_age - 1)
+        # when
+        principal = UserPrincipal.from_claims(payload)
+        # then
+        assert principal is None
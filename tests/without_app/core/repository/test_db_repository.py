@@ -0,0 +1,336 @@
+from datetime import datetime
+
+import pytest
+
+from tbsky_session.core import StatementCache, User, UserRepository, get_statement_cache
+
+
+def make_users(count: int, prefix: str = "user") -> list[User]:
+    return [
+        User(
+            first_name="First",
+            last_name="Last",
+            email=f"{prefix}{i}@example.com",
+            hashed_password="hashed_password",
+        )
+        for i in range(count)
+    ]
+
+
+class TestAddMassive:
+
+    async def test_inserts_in_chunks(self, db, mocker):
+        # given
+        user_repository = UserRepository()
+        insert_chunk = mocker.spy(user_repository, "_insert_chunk")
+        users = make_users(5)
+        # when
+        added_users = await user_repository.add_massive(users, chunk_size=2)
+        chunk_sizes = [len(call.args[0]) for call in insert_chunk.call_args_list]
+        # then
+        assert chunk_sizes == [2, 2, 1]
+        assert [user.email for user in added_users] == [user.email for user in users]
+        assert all(user.created_at is not None for user in added_users)
+        assert await user_repository.count() == 5
+
+    async def test_keeps_pending_objects_of_a_shared_session(self, db):
+        # given
+        user_repository = UserRepository()
+        caller_user = make_users(1, prefix="caller")[0]
+        # when
+        async with user_repository.async_session_factory() as session:
+            session.add(caller_user)
+            await user_repository.add_massive(
+                make_users(3), session=session, chunk_size=2
+            )
+            # then
+            assert caller_user in session
+        assert await user_repository.count() == 4
+        assert await user_repository.exists(email="caller0@example.com")
+
+    async def test_copies_records_in_column_order(self, mocker):
+        # given
+        user_repository = UserRepository()
+        copy_records_to_table = mocker.AsyncMock()
+        raw_connection = mocker.Mock()
+        raw_connection.driver_connection.copy_records_to_table = copy_records_to_table
+        connection = mocker.Mock()
+        connection.get_raw_connection = mocker.AsyncMock(return_value=raw_connection)
+        db_session = mocker.Mock()
+        db_session.connection = mocker.AsyncMock(return_value=connection)
+        users = make_users(3)
+        # when
+        copied_users = await user_repository._add_massive(
+            users, db_session, chunk_size=2, use_copy=True
+        )
+        # then
+        assert copied_users == users
+        assert copy_records_to_table.await_count == 2
+        table = User.__table__  # type: ignore
+        call = copy_records_to_table.await_args_list[0]
+        assert call.args == ("users",)
+        assert call.kwargs["columns"] == [column.name for column in table.columns]
+        record = dict(zip(call.kwargs["columns"], call.kwargs["records"][0]))
+        assert record["email"] == "user0@example.com"
+        assert isinstance(record["created_at"], datetime)
+
+
+class TestIteration:
+
+    async def test_get_iter_streams_matching_rows(self, db):
+        # given
+        user_repository = UserRepository()
+        users = await user_repository.add_massive(make_users(5))
+        deleted_user = make_users(1, prefix="deleted")[0]
+        deleted_user.deleted = True
+        await user_repository.add(deleted_user)
+        # when
+        streamed = [
+            user
+            async for user in user_repository.get_iter(
+                batch_size=2, order_by="-email", last_name="Last"
+            )
+        ]
+        # then
+        assert [user.email for user in streamed] == sorted(
+            (user.email for user in users), reverse=True
+        )
+
+    async def test_get_iter_by_keyset_pages_in_primary_key_order(self, db, mocker):
+        # given
+        user_repository = UserRepository()
+        users = await user_repository.add_massive(make_users(5))
+        session_factory = mocker.spy(user_repository, "async_session_factory")
+        # when
+        iterated = [
+            user async for user in user_repository.get_iter_by_keyset(batch_size=2)
+        ]
+        # then
+        assert [user.user_id for user in iterated] == sorted(
+            user.user_id for user in users
+        )
+        assert session_factory.call_count == 3
+
+    async def test_get_iter_by_keyset_stops_after_an_empty_page(self, db, mocker):
+        # given
+        user_repository = UserRepository()
+        await user_repository.add_massive(make_users(4))
+        session_factory = mocker.spy(user_repository, "async_session_factory")
+        # when
+        iterated = [
+            user async for user in user_repository.get_iter_by_keyset(batch_size=2)
+        ]
+        # then
+        assert len(iterated) == 4
+        assert session_factory.call_count == 3
+
+
+@pytest.fixture
+def statement_cache():
+    get_statement_cache.cache_clear()
+    yield get_statement_cache()
+    get_statement_cache.cache_clear()
+
+
+class TestStatementCache:
+
+    def test_evicts_least_recently_used_statements(self):
+        # given
+        cache = StatementCache(maxsize=2)
+        statements = {key: object() for key in "abc"}
+        cache.get_or_build("a", lambda: statements["a"])
+        cache.get_or_build("b", lambda: statements["b"])
+        cache.get_or_build("a", lambda: statements["a"])
+        # when
+        cache.get_or_build("c", lambda: statements["c"])
+        # then
+        assert len(cache) == 2
+        assert cache.get_or_build("a", object) is statements["a"]
+        assert cache.get_or_build("b", object) is not statements["b"]
+
+    async def test_filters_of_one_shape_share_a_statement(self, db, statement_cache):
+        # given
+        user_repository = UserRepository()
+        await user_repository.add_massive(make_users(3))
+        # when
+        first = await user_repository.get(email="user0@example.com")
+        second = await user_repository.get(email="user1@example.com")
+        # then
+        assert [user.email for user in first] == ["user0@example.com"]
+        assert [user.email for user in second] == ["user1@example.com"]
+        assert (statement_cache.misses, statement_cache.hits) == (1, 1)
+
+    async def test_in_filters_of_any_length_share_a_statement(
+        self, db, statement_cache
+    ):
+        # given
+        user_repository = UserRepository()
+        await user_repository.add_massive(make_users(3))
+        # when
+        one = await user_repository.count(email=["user0@example.com"])
+        two = await user_repository.count(
+            email=("user1@example.com", "user2@example.com")
+        )
+        # then
+        assert (one, two) == (1, 2)
+        assert (statement_cache.misses, statement_cache.hits) == (1, 1)
+
+    async def test_null_and_value_filters_get_their_own_statements(
+        self, db, statement_cache
+    ):
+        # given
+        user_repository = UserRepository()
+        users = make_users(3)
+        users[0].updated_by = "admin"
+        await user_repository.add_massive(users)
+        # when
+        not_updated = await user_repository.count(updated_by=None)
+        updated = await user_repository.count(updated_by="admin")
+        not_updated_again = await user_repository.count(updated_by=None)
+        # then
+        assert (not_updated, updated, not_updated_again) == (2, 1, 2)
+        assert (statement_cache.misses, statement_cache.hits) == (2, 1)
+
+
+class TestOrdering:
+
+    async def test_get_orders_limits_and_offsets(self, db):
+        # given
+        user_repository = UserRepository()
+        await user_repository.add_massive(make_users(5))
+        # when
+        users = await user_repository.get(order_by="-email", limit=2, offset=1)
+        # then
+        assert [user.email for user in users] == [
+            "user3@example.com",
+            "user2@example.com",
+        ]
+
+    async def test_get_orders_by_several_columns(self, db):
+        # given
+        user_repository = UserRepository()
+        users = make_users(3)
+        users[0].first_name = users[2].first_name = "Same"
+        await user_repository.add_massive(users)
+        # when
+        ordered = await user_repository.get(order_by=("first_name", "-email"))
+        # then
+        assert [user.email for user in ordered][-2:] == [
+            "user2@example.com",
+            "user0@example.com",
+        ]
+
+    async def test_get_first_follows_order(self, db):
+        # given
+        user_repository = UserRepository()
+        await user_repository.add_massive(make_users(3))
+        # when
+        first = await user_repository.get_first(order_by="email")
+        last = await user_repository.get_first(order_by="-email")
+        # then
+        assert (first.email, last.email) == (
+            "user0@example.com",
+            "user2@example.com",
+        )
+
+    async def test_get_one_follows_order_and_raises_without_match(self, db):
+        # given
+        user_repository = UserRepository()
+        await user_repository.add_massive(make_users(3))
+        # when
+        user = await user_repository.get_one(order_by="-email", last_name="Last")
+        # then
+        assert user.email == "user2@example.com"
+        with pytest.raises(ValueError):
+            await user_repository.get_one(email="missing@example.com")
+
+
+class TestProjection:
+
+    async def test_get_fields_loads_only_the_named_columns(self, db):
+        # given
+        user_repository = UserRepository()
+        await user_repository.add_massive(make_users(3))
+        # when
+        rows = await user_repository.get_fields("email", "first_name")
+        # then
+        assert sorted(tuple(row) for row in rows) == [
+            ("user0@example.com", "First"),
+            ("user1@example.com", "First"),
+            ("user2@example.com", "First"),
+        ]
+        assert rows[0]._fields == ("email", "first_name")
+
+    async def test_get_fields_as_dict_orders_and_limits(self, db):
+        # given
+        user_repository = UserRepository()
+        await user_repository.add_massive(make_users(4))
+        # when
+        rows = await user_repository.get_fields(
+            "email", order_by="-email", limit=2, offset=1, as_dict=True
+        )
+        # then
+        assert [dict(row) for row in rows] == [
+            {"email": "user2@example.com"},
+            {"email": "user1@example.com"},
+        ]
+
+    async def test_get_fields_filters_like_get(self, db):
+        # given
+        user_repository = UserRepository()
+        await user_repository.add_massive(make_users(3))
+        # when
+        rows = await user_repository.get_fields(
+            "email", email=["user0@example.com", "user2@example.com"], order_by="email"
+        )
+        # then
+        assert [row.email for row in rows] == ["user0@example.com", "user2@example.com"]
+
+    async def test_get_dict_list_groups_duplicate_keys(self, db):
+        # given
+        user_repository = UserRepository()
+        users = make_users(3)
+        users[2].first_name = "Other"
+        await user_repository.add_massive(users)
+        # when
+        grouped = await user_repository.get_dict_list("first_name", order_by="email")
+        # then
+        assert {
+            key: [user.email for user in group] for key, group in grouped.items()
+        } == {
+            "First": ["user0@example.com", "user1@example.com"],
+            "Other": ["user2@example.com"],
+        }
+        assert all(isinstance(user, User) for user in grouped["First"])
+
+    async def test_get_dict_list_with_fields_adds_the_key_column(self, db):
+        # given
+        user_repository = UserRepository()
+        await user_repository.add_massive(make_users(2))
+        # when
+        grouped = await user_repository.get_dict_list(
+            "last_name", "email", order_by="email"
+        )
+        # then
+        assert [tuple(row) for row in grouped["Last"]] == [
+            ("Last", "user0@example.com"),
+            ("Last", "user1@example.com"),
+        ]
+
+    async def test_get_dict_keeps_the_first_row_per_key(self, db):
+        # given
+        user_repository = UserRepository()
+        users = make_users(3)
+        users[2].first_name = "Other"
+        await user_repository.add_massive(users)
+        # when
+        by_name = await user_repository.get_dict("first_name", order_by="-email")
+        by_name_fields = await user_repository.get_dict(
+            "first_name", "email", order_by="email"
+        )
+        # then
+        assert {key: user.email for key, user in by_name.items()} == {
+            "First": "user1@example.com",
+            "Other": "user2@example.com",
+        }
+        assert by_name_fields["First"].email == "user0@example.com"
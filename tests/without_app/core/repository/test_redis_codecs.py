@@ -0,0 +1,82 @@
+import pytest
+
+from tbsky_session.core import (
+    BlackListToken,
+    CompressedCodec,
+    JsonCodec,
+    MsgpackCodec,
+    OrjsonCodec,
+    create_access_token,
+    create_refresh_token,
+    decode_redis_value,
+)
+
+# msgpack and lz4 come with the optional ``speedups`` extra.
+CODECS = {
+    "json": ((), JsonCodec),
+    "orjson": ((), OrjsonCodec),
+    "msgpack": (("msgpack",), MsgpackCodec),
+    "orjson+zlib": ((), lambda: CompressedCodec(OrjsonCodec(), "zlib")),
+    "msgpack+lz4": (
+        ("msgpack", "lz4"),
+        lambda: CompressedCodec(MsgpackCodec(), "lz4"),
+    ),
+}
+
+
+def make_codec(name: str):
+    requirements, factory = CODECS[name]
+    for module in requirements:
+        pytest.importorskip(module)
+    return factory()
+
+
+@pytest.fixture(params=CODECS)
+def codec(request):
+    return make_codec(request.param)
+
+
+@pytest.fixture
+def blacklist_token() -> BlackListToken:
+    access_token, _ = create_access_token({"sub": "user_id"})
+    refresh_token, _ = create_refresh_token({"sub": "user_id"})
+    return BlackListToken(access_token=access_token, refresh_token=refresh_token)
+
+
+class TestRedisCodecs:
+
+    def test_round_trip(self, codec, blacklist_token):
+        # when
+        value = codec.encode(blacklist_token)
+        decoded = decode_redis_value(BlackListToken, value, blacklist_token.key)
+        # then
+        assert decoded == blacklist_token
+
+    def test_reads_values_of_other_codecs(self, codec, blacklist_token):
+        # given
+        value = codec.encode(blacklist_token)
+        # when
+        decoded = OrjsonCodec().decode(BlackListToken, value, blacklist_token.key)
+        # then
+        assert decoded == blacklist_token
+
+    def test_small_values_are_not_compressed(self, blacklist_token):
+        # given
+        pytest.importorskip("msgpack")
+        codec = CompressedCodec(MsgpackCodec(), "zlib", min_size=10_000)
+        # then
+        assert codec.encode(blacklist_token) == MsgpackCodec().encode(blacklist_token)
+
+    def test_unknown_format_is_rejected(self):
+        with pytest.raises(ValueError):
+            decode_redis_value(BlackListToken, b"\xff", "key")
+
+    def test_compact_codecs_store_fewer_bytes(self, blacklist_token):
+        # when
+        sizes = {
+            name: len(make_codec(name).encode(blacklist_token))
+            for name in ("json", "orjson", "msgpack")
+        }
+        # then
+        assert sizes["orjson"] < sizes["json"]
+        assert sizes["msgpack"] < sizes["orjson"]
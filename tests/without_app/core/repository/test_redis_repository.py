@@ -0,0 +1,150 @@
+import time
+from typing import Any, ClassVar, Optional
+
+import pytest
+
+from tbsky_session.core import (
+    NAMESPACE_INDEX_KEY_PREFIX,
+    AppSettings,
+    BaseRedisModel,
+    BaseRedisRepository,
+)
+
+
+class Note(BaseRedisModel):
+    text: str
+    ttl: ClassVar[Optional[int]] = 60
+
+
+class NoteRepository(BaseRedisRepository[Note]):
+    model = Note
+    key_prefix = "note:"
+
+
+def make_notes(count: int) -> list[Note]:
+    return [Note(key=f"note-{i}", text=f"text {i}") for i in range(count)]
+
+
+class TestNamespaceIndex:
+
+    async def test_count_follows_add_and_delete(self, redis, mocker):
+        # given
+        note_repository = NoteRepository()
+        notes = make_notes(3)
+        scan = mocker.spy(redis, "scan")
+        # when
+        await note_repository.add(notes[0])
+        await note_repository.add_massive(notes[1:])
+        await note_repository.delete(notes[1])
+        # then
+        assert await note_repository.count() == 2
+        assert await note_repository.exists()
+        assert scan.call_count == 0
+        assert await redis.zrange(f"{NAMESPACE_INDEX_KEY_PREFIX}note:", 0, -1) == [
+            b"note-0",
+            b"note-2",
+        ]
+
+    async def test_count_drops_expired_keys(self, redis, mocker):
+        # given
+        note_repository = NoteRepository()
+        await note_repository.add_massive(make_notes(2))
+        # when
+        mocker.patch("time.time", return_value=time.time() + 120)
+        # then
+        assert await note_repository.count() == 0
+        assert not await note_repository.exists()
+
+
+@pytest.fixture
+def pipelines(mocker):
+    """Record the ``transaction`` flag and ``execute`` spy of every pipeline."""
+    created: list[tuple[bool, Any]] = []
+    pipeline_factory = NoteRepository.pipeline_factory
+
+    def factory(repository, transaction=True):
+        pipeline = pipeline_factory(repository, transaction)
+        created.append((transaction, mocker.spy(pipeline, "execute")))
+        return pipeline
+
+    mocker.patch.object(NoteRepository, "pipeline_factory", factory)
+    return created
+
+
+class TestAddMassive:
+
+    @pytest.mark.parametrize(
+        ("count", "chunk_size", "chunks"),
+        [(4, 2, 2), (5, 2, 3), (2, 2, 1), (1, 2, 1), (0, 2, 0)],
+    )
+    async def test_sends_one_pipeline_per_chunk(
+        self, redis, pipelines, count, chunk_size, chunks
+    ):
+        # when
+        added = await NoteRepository().add_massive(
+            make_notes(count), chunk_size=chunk_size
+        )
+        # then
+        assert len(added) == count
+        assert len(pipelines) == chunks
+        assert all(execute.call_count == 1 for _, execute in pipelines)
+
+    async def test_chunk_size_defaults_to_the_setting(
+        self, redis, pipelines, monkeypatch
+    ):
+        # given
+        monkeypatch.setattr(AppSettings.database, "REDIS_PIPELINE_CHUNK_SIZE", 3)
+        # when
+        await NoteRepository().add_massive(make_notes(7))
+        # then
+        assert len(pipelines) == 3
+
+    @pytest.mark.parametrize("transaction", [False, True])
+    async def test_transaction_is_opt_in(self, redis, pipelines, transaction):
+        # when
+        if transaction:
+            await NoteRepository().add_massive(make_notes(2), transaction=True)
+        else:
+            await NoteRepository().add_massive(make_notes(2))
+        # then
+        assert [flag for flag, _ in pipelines] == [transaction]
+
+    async def test_writes_prefixed_keys_with_the_model_ttl(self, redis):
+        # when
+        await NoteRepository().add_massive(make_notes(2))
+        # then
+        assert sorted(await redis.keys("note:*")) == [b"note:note-0", b"note:note-1"]
+        assert 55 <= await redis.ttl("note:note-0") <= 60
+        note = await NoteRepository().get_first("note-1")
+        assert (note.key, note.text) == ("note-1", "text 1")
+
+    async def test_skips_expired_models(self, redis):
+        # given
+        notes = make_notes(2)
+        ttls = {notes[0].key: 0}
+
+        class ExpiringNote(Note):
+            def get_ttl(self) -> Optional[int]:
+                return ttls.get(self.key, 60)
+
+        # when
+        await NoteRepository().add_massive(
+            [ExpiringNote(**note.model_dump()) for note in notes]
+        )
+        # then
+        assert await redis.keys("note:*") == [b"note:note-1"]
+
+
+class TestGetIter:
+
+    async def test_reads_the_namespace_in_batches(self, redis, mocker):
+        # given
+        note_repository = NoteRepository()
+        await note_repository.add_massive(make_notes(5))
+        await redis.set("other:key", b"not a note")
+        mget = mocker.spy(redis, "mget")
+        # when
+        notes = [note async for note in note_repository.get_iter(batch_size=2)]
+        # then
+        assert sorted(note.key for note in notes) == [f"note-{i}" for i in range(5)]
+        assert [len(call.args) for call in mget.call_args_list] == [2, 2, 1]
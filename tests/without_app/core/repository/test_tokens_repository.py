@@ -0,0 +1,66 @@
+import pytest
+from fastapi import HTTPException
+
+from tbsky_session.core import REFRESH_FAMILY_KEY_PREFIX, RefreshTokenFamilyRepository
+
+
+class TestRefreshTokenFamilyRepository:
+
+    async def test_start_opens_a_family_at_generation_zero(self, redis):
+        # when
+        claims = await RefreshTokenFamilyRepository().start()
+        # then
+        assert claims["gen"] == 0
+        key = f"{REFRESH_FAMILY_KEY_PREFIX}{claims['fam']}"
+        assert await redis.get(key) == b"0"
+        assert await redis.ttl(key) > 0
+
+    async def test_rotate_advances_the_generation(self, redis):
+        # given
+        refresh_token_family_repository = RefreshTokenFamilyRepository()
+        claims = await refresh_token_family_repository.start()
+        # when
+        rotated = await refresh_token_family_repository.rotate(claims)
+        rotated_again = await refresh_token_family_repository.rotate(rotated)
+        # then
+        assert rotated == {"fam": claims["fam"], "gen": 1}
+        assert rotated_again == {"fam": claims["fam"], "gen": 2}
+
+    async def test_reused_generation_revokes_the_family(self, redis):
+        # given
+        refresh_token_family_repository = RefreshTokenFamilyRepository()
+        claims = await refresh_token_family_repository.start()
+        rotated = await refresh_token_family_repository.rotate(claims)
+        # when
+        with pytest.raises(HTTPException) as exc_info:
+            await refresh_token_family_repository.rotate(claims)
+        # then
+        assert exc_info.value.status_code == 401
+        assert exc_info.value.detail == "Refresh token reused, please log in again"
+        assert await redis.dbsize() == 0
+        with pytest.raises(HTTPException) as exc_info:
+            await refresh_token_family_repository.rotate(rotated)
+        assert exc_info.value.detail == "Invalid refresh token"
+
+    @pytest.mark.parametrize(
+        "payload",
+        [{"fam": "unknown", "gen": 0}, {"fam": "family"}, {"gen": 0}, {}],
+    )
+    async def test_rotate_rejects_unknown_families(self, redis, payload):
+        # when
+        with pytest.raises(HTTPException) as exc_info:
+            await RefreshTokenFamilyRepository().rotate(payload)
+        # then
+        assert exc_info.value.status_code == 401
+        assert exc_info.value.detail == "Invalid refresh token"
+
+    async def test_revoked_family_cannot_rotate(self, redis):
+        # given
+        refresh_token_family_repository = RefreshTokenFamilyRepository()
+        claims = await refresh_token_family_repository.start()
+        # when
+        await refresh_token_family_repository.revoke(claims["fam"])
+        # then
+        with pytest.raises(HTTPException) as exc_info:
+            await refresh_token_family_repository.rotate(claims)
+        assert exc_info.value.detail == "Invalid refresh token"
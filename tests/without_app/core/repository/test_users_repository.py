@@ -0,0 +1,34 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from tbsky_session.core import User, UserRepository
+
+
+def make_user(email: str, deleted: bool = False) -> User:
+    return User(
+        first_name="First",
+        last_name="Last",
+        email=email,
+        hashed_password="hashed_password",
+        deleted=deleted,
+    )
+
+
+class TestUserRepository:
+
+    async def test_active_emails_are_unique_ignoring_case(self, db):
+        # given
+        user_repository = UserRepository()
+        await user_repository.add(make_user("user@example.com"))
+        # then
+        with pytest.raises(IntegrityError):
+            await user_repository.add(make_user("User@Example.com"))
+
+    async def test_email_of_deleted_user_can_be_registered_again(self, db):
+        # given
+        user_repository = UserRepository()
+        await user_repository.add(make_user("user@example.com", deleted=True))
+        # when
+        user = await user_repository.add(make_user("user@example.com"))
+        # then
+        assert await user_repository.get_by_email("USER@example.com") == user
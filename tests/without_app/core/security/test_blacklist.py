@@ -0,0 +1,134 @@
+import time
+from datetime import timedelta
+
+from tbsky_session.core import (
+    BLACKLIST_KEY_PREFIX,
+    NAMESPACE_INDEX_KEY_PREFIX,
+    BlackListToken,
+    BlackListTokenRepository,
+    GenericRepository,
+    create_access_token,
+    create_refresh_token,
+    get_revoked_token_filter,
+    get_token_digest,
+)
+
+
+class TestBlackListTokenRepository:
+
+    async def test_revoke_stores_markers_by_token_digest(self, redis):
+        # given
+        token, _ = create_access_token(
+            {"sub": "user_id"}, expires_delta=timedelta(minutes=5)
+        )
+        key = f"{BLACKLIST_KEY_PREFIX}{get_token_digest(token).hex()}"
+        # when
+        await BlackListTokenRepository().revoke(token)
+        # then
+        assert await redis.get(key) == BlackListTokenRepository.marker
+        assert 290 <= await redis.ttl(key) <= 300
+        assert await redis.keys(f"{BLACKLIST_KEY_PREFIX}*") == [key.encode()]
+
+    async def test_revoke_skips_unusable_tokens(self, redis):
+        # given
+        expired_token, _ = create_access_token(
+            {"sub": "user_id"}, expires_delta=timedelta(seconds=-1)
+        )
+        # when
+        await BlackListTokenRepository().revoke(expired_token, "not-a-token")
+        # then
+        assert await redis.dbsize() == 0
+
+    async def test_check_looks_tokens_up_in_one_mget(self, redis, mocker):
+        # given
+        revoked_token, _ = create_access_token({"sub": "user_id"})
+        live_token, _ = create_access_token({"sub": "user_id"})
+        black_list_token_repository = BlackListTokenRepository()
+        await black_list_token_repository.revoke(revoked_token)
+        mget = mocker.spy(redis, "mget")
+        # when
+        revoked = await black_list_token_repository.check(
+            live_token, None, revoked_token
+        )
+        # then
+        assert revoked == [False, False, True]
+        assert mget.call_count == 1
+        assert len(mget.call_args.args) == 2
+
+    async def test_add_revokes_both_tokens(self, redis):
+        # given
+        access_token, _ = create_access_token({"sub": "user_id"})
+        refresh_token, _ = create_refresh_token({"sub": "user_id"})
+        black_list_token_repository = BlackListTokenRepository()
+        revoked_token_filter = get_revoked_token_filter()
+        await revoked_token_filter.rebuild(redis)
+        # when
+        await black_list_token_repository.add(
+            BlackListToken(access_token=access_token, refresh_token=refresh_token)
+        )
+        # then
+        assert await black_list_token_repository.check(access_token, refresh_token) == [
+            True,
+            True,
+        ]
+        assert revoked_token_filter.might_contain(get_token_digest(access_token))
+
+    async def test_add_massive_revokes_every_token(self, redis):
+        # given
+        tokens = [create_access_token({"sub": f"user_{i}"})[0] for i in range(4)]
+        black_list_token_repository = BlackListTokenRepository()
+        # when
+        await black_list_token_repository.add_massive(
+            [
+                BlackListToken(access_token=tokens[0], refresh_token=tokens[1]),
+                BlackListToken(access_token=tokens[2], refresh_token=tokens[3]),
+            ]
+        )
+        # then
+        assert await black_list_token_repository.count(*tokens) == 4
+        assert await black_list_token_repository.count() == 4
+        markers = await redis.keys(f"{BLACKLIST_KEY_PREFIX}*")
+        assert await redis.mget(*markers) == [b"1"] * 4
+
+    async def test_exists_and_count_go_through_check(self, redis, mocker):
+        # given
+        revoked_token, _ = create_access_token({"sub": "user_id"})
+        live_token, _ = create_access_token({"sub": "user_id"})
+        black_list_token_repository = BlackListTokenRepository()
+        await black_list_token_repository.revoke(revoked_token)
+        check = mocker.spy(black_list_token_repository, "check")
+        # when
+        exists = await black_list_token_repository.exists(live_token, revoked_token)
+        count = await black_list_token_repository.count(live_token)
+        # then
+        assert (exists, count) == (True, 0)
+        assert check.call_count == 2
+        assert await black_list_token_repository.exists()
+
+    async def test_count_reads_the_namespace_index(self, redis, mocker):
+        # given
+        live_token, _ = create_access_token({"sub": "user_id"})
+        expiring_token, _ = create_access_token(
+            {"sub": "user_id"}, expires_delta=timedelta(minutes=5)
+        )
+        black_list_token_repository = BlackListTokenRepository()
+        await black_list_token_repository.revoke(live_token, expiring_token)
+        mocker.patch("time.time", return_value=time.time() + 600)
+        scan = mocker.spy(redis, "scan")
+        # when
+        count = await black_list_token_repository.count()
+        # then
+        assert count == 1
+        assert scan.call_count == 0
+        index_key = f"{NAMESPACE_INDEX_KEY_PREFIX}{BLACKLIST_KEY_PREFIX}"
+        assert await redis.zrange(index_key, 0, -1) == [
+            get_token_digest(live_token).hex().encode()
+        ]
+
+    def test_markers_are_not_read_back_as_models(self):
+        # given
+        black_list_token_repository = BlackListTokenRepository()
+        # then
+        assert not isinstance(black_list_token_repository, GenericRepository)
+        for method in ("get", "get_first", "get_one", "get_iter"):
+            assert not hasattr(black_list_token_repository, method)
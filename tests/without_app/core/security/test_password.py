@@ -0,0 +1,81 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from tbsky_session.core import (
+    AppSettings,
+    PasswordHashingPool,
+    PasswordTools,
+    get_password_hashing_pool,
+)
+
+
+@pytest.fixture
+def hashing_pool():
+    executor = ThreadPoolExecutor(max_workers=1)
+    yield PasswordHashingPool(executor, workers=1, queue_size=1)
+    executor.shutdown()
+
+
+class TestPasswordHashingPool:
+
+    async def test_rejects_jobs_over_the_admission_limit(self, hashing_pool):
+        # given
+        release = threading.Event()
+        admitted = [
+            asyncio.create_task(hashing_pool.run(release.wait)) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        # when
+        with pytest.raises(HTTPException) as exc_info:
+            await hashing_pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*admitted)
+        # then
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers == {
+            "Retry-After": str(
+                AppSettings.security.PASSWORD_HASHING_RETRY_AFTER_SECONDS
+            )
+        }
+        assert hashing_pool.pending == 0
+
+    async def test_counts_jobs_waiting_for_a_worker(self, hashing_pool):
+        # given
+        release = threading.Event()
+        admitted = [
+            asyncio.create_task(hashing_pool.run(release.wait)) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        # then
+        assert hashing_pool.pending == 2
+        assert hashing_pool.queued == 1
+        release.set()
+        await asyncio.gather(*admitted)
+        assert hashing_pool.queued == 0
+
+    async def test_hashes_and_verifies_in_the_pool(self):
+        # when
+        hashed_password = await PasswordTools.get_password_hash_async("Password_1")
+        # then
+        assert await PasswordTools.verify_password_async("Password_1", hashed_password)
+        assert not await PasswordTools.verify_password_async(
+            "Password_2", hashed_password
+        )
+
+    # The child only reads the cache and exits, it takes no lock.
+    @pytest.mark.filterwarnings("ignore:This process .* is multi-threaded")
+    def test_forked_child_builds_its_own_pool(self):
+        # given
+        parent_pool = get_password_hashing_pool()
+        # when
+        if (pid := os.fork()) == 0:
+            os._exit(get_password_hashing_pool.cache_info().currsize)
+        _, status = os.waitpid(pid, 0)
+        # then
+        assert os.waitstatus_to_exitcode(status) == 0
+        assert get_password_hashing_pool() is parent_pool
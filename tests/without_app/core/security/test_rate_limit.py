@@ -0,0 +1,78 @@
+import sys
+
+from fakeredis import FakeAsyncRedis
+
+from tbsky_session.core import SlidingWindowRateLimiter
+
+IP_KEY = "ratelimit:login:ip:127.0.0.1"
+EMAIL_KEY = "ratelimit:login:email:user@example.com"
+
+
+class TestSlidingWindowRateLimiter:
+
+    async def test_blocked_keys_are_rejected_without_redis(self):
+        # given
+        rate_limiter = SlidingWindowRateLimiter()
+        rate_limiter._block("ratelimit:login:ip:127.0.0.1", 60)
+        # when
+        retry_after = await rate_limiter.hit(
+            {
+                "ratelimit:login:ip:127.0.0.1": (10, 60),
+                "ratelimit:login:email:user@example.com": (5, 300),
+            }
+        )
+        # then
+        assert 0 < retry_after <= 60
+        assert rate_limiter.local_rejections == 1
+
+    def test_expired_blocks_are_dropped(self):
+        # given
+        rate_limiter = SlidingWindowRateLimiter()
+        rate_limiter._block("ratelimit:login:ip:127.0.0.1", -1)
+        # then
+        assert rate_limiter._local_retry_after(["ratelimit:login:ip:127.0.0.1"]) == 0
+        assert not rate_limiter._blocked_until
+
+
+class TestSlidingWindowScript:
+
+    async def test_blocks_requests_over_the_limit(self, redis):
+        # given
+        rate_limiter = SlidingWindowRateLimiter()
+        admitted = [await rate_limiter.hit({IP_KEY: (2, 60)}) for _ in range(2)]
+        # when
+        retry_after = await rate_limiter.hit({IP_KEY: (2, 60)})
+        # then
+        assert admitted == [0, 0]
+        assert 59 < retry_after <= 60
+        assert await redis.zcard(IP_KEY) == 2
+        assert 0 < await redis.pttl(IP_KEY) <= 60_000
+
+    async def test_records_requests_only_when_every_key_admits_them(self, redis):
+        # given
+        rate_limiter = SlidingWindowRateLimiter()
+        limits = {IP_KEY: (10, 60), EMAIL_KEY: (1, 300)}
+        await rate_limiter.hit(limits)
+        # when
+        retry_after = await rate_limiter.hit(limits)
+        # then
+        assert 299 < retry_after <= 300
+        assert await redis.zcard(IP_KEY) == 1
+        assert rate_limiter._local_retry_after([EMAIL_KEY]) > 0
+        assert not rate_limiter._local_retry_after([IP_KEY])
+
+    async def test_runs_on_the_current_client(self, redis, monkeypatch):
+        # given
+        rate_limit_module = sys.modules[SlidingWindowRateLimiter.__module__]
+        stale_redis = FakeAsyncRedis()
+        monkeypatch.setattr(
+            rate_limit_module, "get_redis_connection", lambda: stale_redis
+        )
+        rate_limiter = SlidingWindowRateLimiter()
+        await stale_redis.close()
+        monkeypatch.setattr(rate_limit_module, "get_redis_connection", lambda: redis)
+        # when
+        retry_after = await rate_limiter.hit({IP_KEY: (1, 60)})
+        # then
+        assert retry_after == 0
+        assert await redis.zcard(IP_KEY) == 1
@@ -0,0 +1,119 @@
+import asyncio
+
+from tbsky_session.core import (
+    BlackListTokenRepository,
+    BloomFilter,
+    RevokedTokenFilter,
+    create_access_token,
+    get_revoked_token_filter,
+    get_token_digest,
+)
+
+
+def make_filter() -> RevokedTokenFilter:
+    return RevokedTokenFilter(
+        capacity=10, false_positive_rate=0.01, rebuild_interval=60
+    )
+
+
+async def wait_for(condition) -> None:
+    async with asyncio.timeout(2):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+class TestRevokedTokenFilter:
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        # given
+        bloom = BloomFilter(capacity=1000, false_positive_rate=0.01)
+        digests = [get_token_digest(f"token-{i}") for i in range(1000)]
+        # when
+        for digest in digests:
+            bloom.add(digest)
+        # then
+        assert all(digest in bloom for digest in digests)
+        assert bloom.expected_false_positive_rate < 0.02
+
+    def test_not_ready_filter_passes_everything_through(self):
+        # given
+        revoked_token_filter = RevokedTokenFilter(
+            capacity=10, false_positive_rate=0.01, rebuild_interval=60
+        )
+        # then
+        assert revoked_token_filter.might_contain(get_token_digest("token"))
+        assert revoked_token_filter.definite_negatives == 0
+
+    def test_ready_filter_answers_negatives_locally(self):
+        # given
+        revoked_token_filter = RevokedTokenFilter(
+            capacity=10, false_positive_rate=0.01, rebuild_interval=60
+        )
+        revoked_token_filter.ready = True
+        revoked_token_filter.add(get_token_digest("revoked"))
+        # then
+        assert revoked_token_filter.might_contain(get_token_digest("revoked"))
+        assert not revoked_token_filter.might_contain(get_token_digest("live"))
+        assert revoked_token_filter.definite_negatives == 1
+
+
+class TestRevokedTokenFilterWithBlacklist:
+
+    async def test_rebuild_loads_revoked_digests(self, redis):
+        # given
+        revoked_token, _ = create_access_token({"sub": "user_id"})
+        live_token, _ = create_access_token({"sub": "user_id"})
+        await BlackListTokenRepository().revoke(revoked_token)
+        revoked_token_filter = make_filter()
+        # when
+        await revoked_token_filter.rebuild(redis)
+        # then
+        assert revoked_token_filter.ready
+        assert revoked_token_filter.might_contain(get_token_digest(revoked_token))
+        assert not revoked_token_filter.might_contain(get_token_digest(live_token))
+
+    async def test_rebuild_forgets_expired_revocations(self, redis):
+        # given
+        token, _ = create_access_token({"sub": "user_id"})
+        await BlackListTokenRepository().revoke(token)
+        revoked_token_filter = make_filter()
+        await revoked_token_filter.rebuild(redis)
+        await redis.flushall()
+        # when
+        await revoked_token_filter.rebuild(redis)
+        # then
+        assert not revoked_token_filter.might_contain(get_token_digest(token))
+
+    async def test_check_skips_redis_for_filtered_tokens(self, redis, mocker):
+        # given
+        revoked_token, _ = create_access_token({"sub": "user_id"})
+        live_token, _ = create_access_token({"sub": "user_id"})
+        black_list_token_repository = BlackListTokenRepository()
+        await black_list_token_repository.revoke(revoked_token)
+        revoked_token_filter = get_revoked_token_filter()
+        await revoked_token_filter.rebuild(redis)
+        mget = mocker.spy(redis, "mget")
+        # when
+        live = await black_list_token_repository.check(live_token)
+        revoked = await black_list_token_repository.check(revoked_token)
+        # then
+        assert (live, revoked) == ([False], [True])
+        assert mget.call_count == 1
+        assert revoked_token_filter.definite_negatives == 1
+        assert revoked_token_filter.true_positives == 1
+
+    async def test_sync_receives_revocations_of_other_instances(self, redis):
+        # given
+        token, _ = create_access_token({"sub": "user_id"})
+        digest = get_token_digest(token)
+        revoked_token_filter = make_filter()
+        sync = asyncio.create_task(revoked_token_filter.sync())
+        try:
+            await wait_for(lambda: revoked_token_filter.ready)
+            # when
+            await BlackListTokenRepository().revoke(token)
+            # then
+            await wait_for(lambda: revoked_token_filter.might_contain(digest))
+        finally:
+            sync.cancel()
+            await asyncio.gather(sync, return_exceptions=True)
@@ -0,0 +1,85 @@
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from tbsky_session.core import (
+    create_access_token,
+    create_refresh_token,
+    decode_jwt_token,
+    get_token_digest,
+    get_verified_token_cache,
+)
+
+
+class TestJwtToken:
+
+    def test_create_access_token(self):
+        # when
+        token, expires_in = create_access_token(
+            {"sub": "user_id"}, expires_delta=timedelta(minutes=5)
+        )
+        payload = decode_jwt_token(token)
+        # then
+        assert expires_in == 300
+        assert set(payload) == {"sub", "typ", "iat", "exp", "jti"}
+        assert payload["typ"] == "access"
+        assert payload["exp"] - payload["iat"] == 300
+
+    def test_tokens_of_the_same_second_differ(self):
+        # when
+        first_token, _ = create_access_token({"sub": "user_id"})
+        second_token, _ = create_access_token({"sub": "user_id"})
+        # then
+        assert first_token != second_token
+        assert decode_jwt_token(first_token)["jti"] != (
+            decode_jwt_token(second_token)["jti"]
+        )
+
+    def test_create_refresh_token_counts_days(self):
+        # when
+        token, expires_in = create_refresh_token(
+            {"sub": "user_id"}, expires_delta=timedelta(days=2)
+        )
+        # then
+        assert expires_in == 2 * 24 * 60 * 60
+        assert decode_jwt_token(token)["typ"] == "refresh"
+
+    def test_decode_expired_token(self):
+        # given
+        token, _ = create_access_token(
+            {"sub": "user_id"}, expires_delta=timedelta(seconds=-1)
+        )
+        # when
+        with pytest.raises(HTTPException) as exc_info:
+            decode_jwt_token(token)
+        # then
+        assert exc_info.value.status_code == 401
+
+    def test_decode_invalid_token(self):
+        with pytest.raises(HTTPException) as exc_info:
+            decode_jwt_token("not-a-token")
+        assert exc_info.value.status_code == 401
+
+    def test_decode_uses_verified_token_cache(self):
+        # given
+        token, _ = create_access_token({"sub": "user_id"})
+        verified_token_cache = get_verified_token_cache()
+        decode_jwt_token(token)
+        hits = verified_token_cache.hits
+        # when
+        payload = decode_jwt_token(token)
+        payload["sub"] = "changed"
+        # then
+        assert verified_token_cache.hits == hits + 1
+        assert decode_jwt_token(token)["sub"] == "user_id"
+
+    def test_verified_token_cache_entry_capped_by_exp(self):
+        # given
+        verified_token_cache = get_verified_token_cache()
+        digest = get_token_digest("token")
+        # when
+        verified_token_cache.set(digest, {"sub": "user_id", "exp": time.time() - 1})
+        # then
+        assert verified_token_cache.get(digest) is None
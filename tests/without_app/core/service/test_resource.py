@@ -0,0 +1,96 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlmodel import col
+
+from tbsky_session.core import (
+    AppSettings,
+    BlackListTokenRepository,
+    User,
+    UserPrincipal,
+    UserRepository,
+    create_access_token,
+    create_refresh_token,
+    get_user_by_access_token,
+)
+
+
+class TestGetUserByAccessToken:
+
+    async def test_rejects_refresh_tokens(self, redis):
+        # given
+        refresh_token, _ = create_refresh_token({"sub": "user_id", "fam": "f"})
+        # when
+        with pytest.raises(HTTPException) as exc_info:
+            await get_user_by_access_token(
+                access_token_from_header=None,
+                access_token=refresh_token,
+                refresh_token=refresh_token,
+                user_repository=UserRepository(),
+                black_list_token_repository=BlackListTokenRepository(),
+            )
+        # then
+        assert exc_info.value.status_code == 401
+        assert exc_info.value.detail == "Invalid access token"
+
+    async def test_rejects_revoked_access_tokens(self, redis):
+        # given
+        access_token, _ = create_access_token({"sub": "user_id"})
+        black_list_token_repository = BlackListTokenRepository()
+        await black_list_token_repository.revoke(access_token)
+        # when
+        with pytest.raises(HTTPException) as exc_info:
+            await get_user_by_access_token(
+                access_token_from_header=access_token,
+                access_token=None,
+                refresh_token=None,
+                user_repository=UserRepository(),
+                black_list_token_repository=black_list_token_repository,
+            )
+        # then
+        assert exc_info.value.status_code == 401
+        assert exc_info.value.detail == "Invalid access token"
+
+    async def test_rejects_deleted_users_once_principal_claims_are_stale(
+        self, db, redis, monkeypatch, mocker
+    ):
+        # given
+        monkeypatch.setattr(AppSettings.security, "PRINCIPAL_CLAIMS_ENABLED", True)
+        user_repository = UserRepository()
+        user = await user_repository.add(
+            User(
+                first_name="First",
+                last_name="Last",
+                email="deleted-later@example.com",
+                hashed_password="hashed_password",
+            )
+        )
+        access_token, _ = create_access_token(
+            {"sub": str(user.user_id), **UserPrincipal.to_claims(user)}
+        )
+        async with user_repository.async_session_factory() as db_session:
+            await db_session.execute(
+                update(User)
+                .where(col(User.user_id) == user.user_id)
+                .values(deleted=True)
+            )
+
+        async def authenticate():
+            return await get_user_by_access_token(
+                access_token_from_header=access_token,
+                access_token=None,
+                refresh_token=None,
+                user_repository=user_repository,
+                black_list_token_repository=BlackListTokenRepository(),
+            )
+
+        assert isinstance(await authenticate(), UserPrincipal)
+        # when
+        max_age = AppSettings.security.PRINCIPAL_CLAIMS_MAX_AGE_SECONDS
+        mocker.patch("time.time", return_value=time.time() + max_age + 1)
+        with pytest.raises(HTTPException) as exc_info:
+            await authenticate()
+        # then
+        assert exc_info.value.status_code == 401
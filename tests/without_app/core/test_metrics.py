@@ -0,0 +1,55 @@
+import os
+
+import pytest
+from prometheus_client import REGISTRY
+
+from tbsky_session.core import (
+    AppSettings,
+    close_redis_connection,
+    get_async_engine,
+    get_redis_connection,
+)
+
+
+@pytest.fixture
+async def pools():
+    get_async_engine.cache_clear()
+    await close_redis_connection()
+    yield
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+    get_async_engine.cache_clear()
+    await close_redis_connection()
+
+
+class TestPoolStatisticsCollector:
+
+    async def test_skips_pools_not_created_yet(self, pools):
+        # when
+        size = REGISTRY.get_sample_value("db_pool_size", {"pid": str(os.getpid())})
+        created = REGISTRY.get_sample_value(
+            "redis_pool_created", {"pid": str(os.getpid())}
+        )
+        # then
+        assert size is None
+        assert created is None
+
+    async def test_reports_pools_of_this_process(self, pools):
+        # given
+        get_async_engine()
+        get_redis_connection()
+        labels = {"pid": str(os.getpid())}
+        # when
+        size = REGISTRY.get_sample_value("db_pool_size", labels)
+        waiters = REGISTRY.get_sample_value("db_pool_waiters", labels)
+        max_connections = REGISTRY.get_sample_value(
+            "redis_pool_max_connections", labels
+        )
+        acquisitions = REGISTRY.get_sample_value(
+            "redis_pool_acquisitions_total", labels
+        )
+        # then
+        assert size == AppSettings.database.POOL_SIZE
+        assert waiters == 0
+        assert max_connections == AppSettings.database.REDIS_MAX_CONNECTIONS
+        assert acquisitions == 0
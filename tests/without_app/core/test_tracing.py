@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from tbsky_session.core import (
+    AppSettings,
+    instrument_engine,
+    reset_request_timings,
+    start_request_timings,
+    traced,
+)
+
+
+@pytest.fixture
+def timings(monkeypatch):
+    monkeypatch.setattr(AppSettings.server, "TIMING_SAMPLE_RATE", 1)
+    yield start_request_timings()
+    reset_request_timings()
+
+
+@traced("sync")
+def sync_call(value):
+    return value
+
+
+@traced("async")
+async def async_call(value):
+    return value
+
+
+@traced("async")
+async def failing_call():
+    raise ValueError
+
+
+class TestTraced:
+
+    async def test_records_spans_of_sampled_requests(self, timings):
+        # when
+        assert sync_call(1) == 1
+        assert await async_call(2) == 2
+        with pytest.raises(ValueError):
+            await failing_call()
+        # then
+        assert [span.name for span in timings.spans] == ["sync", "async", "async"]
+        assert all(span.end_ns >= span.start_ns for span in timings.spans)
+        assert "async;dur=" in timings.server_timing()
+
+    async def test_skips_unsampled_requests(self, monkeypatch):
+        # given
+        monkeypatch.setattr(AppSettings.server, "TIMING_SAMPLE_RATE", 0)
+        # when
+        timings = start_request_timings()
+        # then
+        assert timings is None
+        assert sync_call(1) == 1
+        assert await async_call(2) == 2
+
+
+class TestInstrumentEngine:
+
+    async def test_records_succeeded_and_failed_statements(self, db, timings):
+        # given
+        instrument_engine(db.sync_engine)
+        # when
+        async with db.connect() as async_conn:
+            await async_conn.execute(text("SELECT 1"))
+            with pytest.raises(OperationalError):
+                await async_conn.execute(text("SELECT * FROM missing_table"))
+            await async_conn.execute(text("SELECT 1"))
+        # then
+        assert [span.name for span in timings.spans] == ["db", "db", "db"]